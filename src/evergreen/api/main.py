@@ -10,17 +10,21 @@ from typing import Annotated, Any
 from uuid import UUID
 
 import structlog
+import orjson
 from fastapi import FastAPI, HTTPException, status, Depends
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
 from evergreen import __version__
 from evergreen.config import settings
+from evergreen.logging_config import configure_logging
 from evergreen.models import QueryRequest, QueryResponse
-from evergreen.db import init_db, close_db, get_db
+from evergreen.db import init_db, close_db, get_db, get_db_context
 from evergreen.auth.dependencies import CurrentUser, CurrentTenant
 from evergreen.api.routes import auth_router, tenants_router
 
+configure_logging()
 logger = structlog.get_logger()
 
 
@@ -58,10 +62,31 @@ async def lifespan(app: FastAPI):
     await init_db()
     logger.info("Database initialized")
     
+    # Create any missing tenant collections before traffic arrives
+    try:
+        from evergreen.services.tenant import TenantService
+        from evergreen.storage.vector import VectorStore
+        async with get_db_context() as db:
+            tenant_ids = [
+                str(tenant.id)
+                async for tenant in TenantService(db).list(limit=None)
+            ]
+        await VectorStore().bootstrap_tenants(tenant_ids)
+    except Exception as e:
+        logger.warning("Tenant collection bootstrap failed", error=str(e))
+    
     yield
     
     # Shutdown
     logger.info("Shutting down Evergreen")
+    from evergreen.retrieval.engine import close_clients
+    await close_clients()
+    from evergreen.auth.revocation import close_revocation_client
+    await close_revocation_client()
+    from evergreen.storage.graph import close_graph_clients
+    await close_graph_clients()
+    from evergreen.storage.vector import close_vector_clients
+    await close_vector_clients()
     await close_db()
 
 
@@ -240,6 +265,49 @@ async def query_knowledge(
         )
 
 
+@app.post("/api/v1/query/stream")
+async def query_knowledge_stream(
+    request: QueryRequestBody,
+    user: CurrentUser,
+    tenant_id: CurrentTenant,
+) -> StreamingResponse:
+    """
+    Execute a query and stream the answer as server-sent events.
+    
+    The first event carries the sources and entities; each following
+    event carries a fragment of the answer text. A failure ends the
+    stream with an "error" event.
+    """
+    from evergreen.retrieval import RetrievalEngine
+    
+    logger.info(
+        "Streaming query received",
+        tenant_id=str(tenant_id),
+        user_id=user.sub,
+        query=request.query[:100],
+    )
+    
+    engine = RetrievalEngine()
+    
+    async def event_stream():
+        try:
+            async for event in engine.query_stream(
+                tenant_id=str(tenant_id),
+                query=request.query,
+                top_k=request.top_k,
+                filters=request.filters,
+                include_graph=request.include_entities,
+            ):
+                yield b"data: " + orjson.dumps(event, default=str) + b"\n\n"
+        except Exception as e:
+            # Headers are already sent, so report the failure in-band
+            logger.error("Query failed", error=str(e))
+            event = {"type": "error", "detail": f"Query failed: {str(e)}"}
+            yield b"data: " + orjson.dumps(event) + b"\n\n"
+    
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+
 # =============================================================================
 # Sync Endpoints (protected)
 # =============================================================================
@@ -64,7 +64,7 @@ async def get_current_tenant(
     Get the current user's tenant.
     """
     tenant_service = TenantService(db)
-    tenant = await tenant_service.get(tenant_id)
+    tenant = await tenant_service.get(tenant_id, with_connections=True)
     
     if not tenant:
         raise HTTPException(
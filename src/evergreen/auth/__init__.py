@@ -8,6 +8,7 @@ from evergreen.auth.jwt import (
     create_access_token,
     create_refresh_token,
     decode_token,
+    sign_pair,
     TokenData,
 )
 from evergreen.auth.dependencies import (
@@ -28,6 +29,7 @@ __all__ = [
     "create_access_token",
     "create_refresh_token",
     "decode_token",
+    "sign_pair",
     "TokenData",
     # Dependencies
     "get_current_user",
@@ -5,11 +5,13 @@ Creates and validates JWT tokens with tenant claims.
 """
 
 from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 from typing import Any
 from uuid import UUID
 
 import structlog
-from jose import JWTError, jwt
+from jose import JWTError, jwk, jwt
+from jose.backends.base import Key
 from pydantic import BaseModel
 
 from evergreen.config import settings
@@ -32,6 +34,17 @@ class TokenError(Exception):
     pass
 
 
+@lru_cache(maxsize=1)
+def _signing_key() -> Key:
+    """
+    Signing key parsed once from settings.
+    
+    jose otherwise rebuilds the key object (or parses the PEM, for RSA/EC
+    algorithms) on every encode and decode.
+    """
+    return jwk.construct(settings.jwt_secret_key, settings.jwt_algorithm)
+
+
 def create_access_token(
     user_id: str,
     tenant_id: UUID,
@@ -67,7 +80,7 @@ def create_access_token(
         "token_type": "access",
     }
     
-    token = jwt.encode(payload, settings.jwt_secret_key, algorithm=settings.jwt_algorithm)
+    token = jwt.encode(payload, _signing_key(), algorithm=settings.jwt_algorithm)
     
     logger.debug(
         "Access token created",
@@ -83,6 +96,8 @@ def create_refresh_token(
     user_id: str,
     tenant_id: UUID,
     expires_delta: timedelta | None = None,
+    email: str | None = None,
+    role: str | None = None,
 ) -> str:
     """
     Create a JWT refresh token.
@@ -91,6 +106,8 @@ def create_refresh_token(
         user_id: User identifier
         tenant_id: Tenant identifier
         expires_delta: Custom expiration time
+        email: User email, lets refresh re-mint access tokens from claims
+        role: User role, lets refresh re-mint access tokens from claims
         
     Returns:
         Encoded JWT refresh token
@@ -107,8 +124,12 @@ def create_refresh_token(
         "iat": datetime.now(timezone.utc),
         "token_type": "refresh",
     }
+    if email is not None:
+        payload["email"] = email
+    if role is not None:
+        payload["role"] = role
     
-    token = jwt.encode(payload, settings.jwt_secret_key, algorithm=settings.jwt_algorithm)
+    token = jwt.encode(payload, _signing_key(), algorithm=settings.jwt_algorithm)
     
     logger.debug(
         "Refresh token created",
@@ -119,6 +140,69 @@ def create_refresh_token(
     return token
 
 
+def sign_pair(
+    user_id: str,
+    tenant_id: UUID,
+    email: str,
+    role: str = "user",
+    expires_at: datetime | None = None,
+) -> tuple[str, str]:
+    """
+    Create an access token and a refresh token for the same user.
+    
+    Both payloads share one timestamp and are signed with the cached key.
+    
+    Args:
+        user_id: User identifier
+        tenant_id: Tenant identifier
+        email: User email
+        role: User role (user, admin)
+        expires_at: Latest expiry for both tokens, e.g. that of the refresh
+            token being exchanged
+        
+    Returns:
+        Tuple of (access_token, refresh_token)
+    """
+    now = datetime.now(timezone.utc)
+    tid = str(tenant_id)
+    claims = {
+        "sub": str(user_id),
+        "tenant_id": tid,
+        "email": email,
+        "role": role,
+        "iat": now,
+    }
+    key = _signing_key()
+    access_exp = now + timedelta(minutes=settings.access_token_expire_minutes)
+    refresh_exp = now + timedelta(days=settings.refresh_token_expire_days)
+    if expires_at is not None:
+        access_exp = min(access_exp, expires_at)
+        refresh_exp = min(refresh_exp, expires_at)
+    
+    access_token = jwt.encode(
+        {
+            **claims,
+            "exp": access_exp,
+            "token_type": "access",
+        },
+        key,
+        algorithm=settings.jwt_algorithm,
+    )
+    refresh_token = jwt.encode(
+        {
+            **claims,
+            "exp": refresh_exp,
+            "token_type": "refresh",
+        },
+        key,
+        algorithm=settings.jwt_algorithm,
+    )
+    
+    logger.debug("Token pair created", user_id=user_id, tenant_id=tid)
+    
+    return access_token, refresh_token
+
+
 def decode_token(token: str) -> TokenData:
     """
     Decode and validate a JWT token.
@@ -135,7 +219,7 @@ def decode_token(token: str) -> TokenData:
     try:
         payload = jwt.decode(
             token,
-            settings.jwt_secret_key,
+            _signing_key(),
             algorithms=[settings.jwt_algorithm],
         )
         
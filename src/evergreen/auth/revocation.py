@@ -0,0 +1,73 @@
+"""
+Redis markers for users whose refresh tokens can't be trusted on claims alone.
+
+A user is marked when deactivated or when their role changes. Marked users
+are re-checked against the database on refresh; everyone else is refreshed
+from the token claims without a DB round-trip.
+"""
+
+from functools import lru_cache
+
+import structlog
+from redis.asyncio import Redis
+
+from evergreen.config import settings
+
+logger = structlog.get_logger()
+
+STALE_USER_KEY = "auth:stale_user:{user_id}"
+
+
+@lru_cache(maxsize=1)
+def _redis() -> Redis:
+    """Shared Redis client (created on first use)."""
+    return Redis.from_url(settings.redis_url)
+
+
+async def mark_user_stale(user_id: str) -> None:
+    """
+    Force the next refreshes for a user through the database.
+    
+    The marker outlives every refresh token issued before it. Fails closed:
+    errors propagate, so the change that required the marker is rolled back
+    rather than left refreshable from stale claims.
+    
+    Args:
+        user_id: User identifier
+        
+    Raises:
+        RedisError: If the marker couldn't be written
+    """
+    try:
+        await _redis().set(
+            STALE_USER_KEY.format(user_id=user_id),
+            1,
+            ex=settings.refresh_token_expire_days * 86400,
+        )
+    except Exception as e:
+        logger.error("Failed to mark user stale", user_id=user_id, error=str(e))
+        raise
+
+
+async def is_user_stale(user_id: str) -> bool | None:
+    """
+    Check whether a user must be re-validated against the database.
+    
+    Args:
+        user_id: User identifier
+        
+    Returns:
+        True/False, or None if Redis is unavailable
+    """
+    try:
+        return bool(await _redis().exists(STALE_USER_KEY.format(user_id=user_id)))
+    except Exception as e:
+        logger.warning("Revocation check unavailable", user_id=user_id, error=str(e))
+        return None
+
+
+async def close_revocation_client() -> None:
+    """Close the shared Redis client if it was created."""
+    if _redis.cache_info().currsize:
+        await _redis().aclose()
+        _redis.cache_clear()
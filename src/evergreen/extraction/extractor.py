@@ -207,10 +207,9 @@ class EntityExtractor:
                 entity_id=entity_map[key].id,
                 document_id=chunk.document_id,
                 chunk_id=chunk.id,
-                text=raw["text"],
-                start_position=raw["start"],
-                end_position=raw["end"],
-                confidence=raw["confidence"],
+                start_char=raw["start"],
+                end_char=raw["end"],
+                context=chunk.content[max(0, raw["start"] - 50):raw["end"] + 50],
             )
             mentions.append(mention)
         
@@ -246,11 +245,11 @@ class EntityExtractor:
             for target in entities[i+1:]:
                 # Create weak relationship based on co-occurrence
                 rel = Relationship(
-                    id=uuid4(),
+                    tenant_id=source.tenant_id,
                     source_entity_id=source.id,
                     target_entity_id=target.id,
-                    relation_type="co_occurs_with",
-                    confidence=0.3,  # Low confidence for co-occurrence
+                    relationship_type="co_occurs_with",
+                    strength=0.3,  # Weak evidence for co-occurrence
                     metadata={
                         "extraction_method": "co_occurrence",
                     },
@@ -4,7 +4,10 @@ Ingestion orchestrator that coordinates the full pipeline.
 Takes raw documents through parsing, chunking, embedding, and storage.
 """
 
+import asyncio
+import re
 from datetime import datetime
+from itertools import chain
 from typing import Any
 
 import structlog
@@ -13,18 +16,46 @@ from evergreen.config import settings
 from evergreen.ingestion.parser import DocumentParser
 from evergreen.ingestion.chunker import SemanticChunker
 from evergreen.extraction.extractor import EntityExtractor
-from evergreen.storage.embeddings import EmbeddingGenerator, get_embedding_generator
+from evergreen.storage.embeddings import (
+    EmbeddingGenerator,
+    SparseEmbeddingGenerator,
+    get_embedding_generator,
+    get_sparse_embedding_generator,
+)
 from evergreen.storage.vector import VectorStore
 from evergreen.storage.graph import GraphStore
 from evergreen.models import (
+    DataSource,
     DocumentChunk,
     DocumentStatus,
+    Entity,
+    EntityMention,
     IndexedDocument,
     RawDocument,
 )
 
 logger = structlog.get_logger()
 
+# Slack bodies up to this size with no markup are already plain text
+PRECLEAN_MAX_CHARS = 2048
+
+# Chunks shorter than this ("Thanks!", "Sounds good") are not sent to the extractor
+MIN_ENTITY_CHUNK_CHARS = 30
+
+# Signs of a nameable entity. A lone capitalized word only counts away
+# from a sentence start, since every sentence opens with one
+_ENTITY_HINT_RE = re.compile(
+    r"\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)+\b"  # Multi-word proper noun
+    r"|(?<=[a-z,]\s)[A-Z][a-z]{2,}\b"  # Capitalized word mid-sentence
+    r"|\w@\w"  # Email address
+    r"|[$€£]\s?\d|\d[/.-]\d|\b\d{4}\b"  # Money, dates, phone numbers, years
+)
+
+
+def _likely_has_entity(text: str) -> bool:
+    """Cheap check for whether a chunk could yield any entities."""
+    return len(text) >= MIN_ENTITY_CHUNK_CHARS and bool(_ENTITY_HINT_RE.search(text))
+
 
 class IngestionOrchestrator:
     """
@@ -46,6 +77,7 @@ class IngestionOrchestrator:
         embedder: EmbeddingGenerator | None = None,
         vector_store: VectorStore | None = None,
         graph_store: GraphStore | None = None,
+        sparse_embedder: SparseEmbeddingGenerator | None = None,
     ):
         """
         Initialize the orchestrator with pipeline components.
@@ -57,6 +89,8 @@ class IngestionOrchestrator:
             embedder: Embedding generator (or creates default)
             vector_store: Vector store (or creates default)
             graph_store: Graph store (or creates default)
+            sparse_embedder: Sparse embedding generator for hybrid search
+                (or the shared one, if configured)
         """
         self.parser = parser or DocumentParser()
         self.chunker = chunker or SemanticChunker()
@@ -66,6 +100,7 @@ class IngestionOrchestrator:
         )
         self.vector_store = vector_store or VectorStore()
         self.graph_store = graph_store or GraphStore()
+        self.sparse_embedder = sparse_embedder or get_sparse_embedding_generator()
 
     async def ingest(self, document: RawDocument) -> IndexedDocument:
         """
@@ -84,9 +119,12 @@ class IngestionOrchestrator:
         )
         
         try:
-            # Stage 1: Parse
-            parsed = self.parser.parse(document)
-            logger.debug("Document parsed", document_id=document.id)
+            # Stage 1: Parse (skipped for bodies that are already clean)
+            if self._needs_parsing(document):
+                parsed = self.parser.parse(document)
+                logger.debug("Document parsed", document_id=document.id)
+            else:
+                parsed = document
             
             # Stage 2: Chunk
             chunks = self.chunker.chunk(parsed)
@@ -96,47 +134,32 @@ class IngestionOrchestrator:
                 chunk_count=len(chunks),
             )
             
-            # Stage 3: Extract entities from all chunks
-            all_entities = []
-            all_mentions = []
-            for chunk in chunks:
-                entities, mentions = await self.extractor.extract_from_chunk(chunk)
-                all_entities.extend(entities)
-                all_mentions.extend(mentions)
+            # Stores key tenants by str; the document carries a UUID
+            tenant_id = str(document.tenant_id)
             
-            logger.debug(
-                "Entities extracted",
-                document_id=document.id,
-                entity_count=len(all_entities),
+            # Stages 3-5: Extract entities while embeddings stream into the
+            # vector DB batch by batch
+            (all_entities, all_mentions), embedding_count = await asyncio.gather(
+                self._extract_entities(chunks),
+                self._embed_and_store(tenant_id, chunks),
             )
+            chunk_ids = [chunk.id for chunk in chunks]
             
-            # Stage 4: Generate embeddings
-            chunk_embeddings = await self.embedder.embed_chunks(chunks)
             logger.debug(
-                "Embeddings generated",
+                "Entities extracted and embeddings stored",
                 document_id=document.id,
-                embedding_count=len(chunk_embeddings),
+                entity_count=len(all_entities),
+                embedding_count=embedding_count,
             )
             
-            # Stage 5: Store in vector DB
-            await self.vector_store.upsert(document.tenant_id, chunk_embeddings)
-            chunk_ids = [chunk.id for chunk in chunks]
-            
             # Stage 6: Store entities in graph DB
-            await self.graph_store.ensure_schema(document.tenant_id)
-            entity_ids = []
-            for entity in all_entities:
-                entity_id = await self.graph_store.create_entity(
-                    document.tenant_id, entity
-                )
-                entity_ids.append(entity.id)
-                
-                # Link entity to document
-                await self.graph_store.link_entity_to_document(
-                    document.tenant_id,
-                    entity_id,
-                    str(document.id),
-                )
+            await self.graph_store.ensure_schema(tenant_id)
+            entity_ids = await self.graph_store.upsert_entities_with_links(
+                tenant_id,
+                str(document.id),
+                all_entities,
+                all_mentions,
+            )
             
             # Create indexed document record
             indexed = IndexedDocument(
@@ -156,7 +179,7 @@ class IngestionOrchestrator:
                 "Ingestion complete",
                 document_id=document.id,
                 chunks=len(chunks),
-                entities=len(entities),
+                entities=len(all_entities),
             )
             
             return indexed
@@ -179,6 +202,74 @@ class IngestionOrchestrator:
                 error_message=str(e),
             )
 
+    async def _extract_entities(
+        self,
+        chunks: list[DocumentChunk],
+    ) -> tuple[list[Entity], list[EntityMention]]:
+        """Extract entities and mentions from all chunks of a document."""
+        candidates = [chunk for chunk in chunks if _likely_has_entity(chunk.content)]
+        if len(candidates) < len(chunks):
+            logger.debug(
+                "Chunks skipped for entity extraction",
+                skipped_count=len(chunks) - len(candidates),
+            )
+        
+        per_chunk = await asyncio.gather(
+            *[self.extractor.extract_from_chunk(chunk) for chunk in candidates]
+        )
+        all_entities = list(chain.from_iterable(p[0] for p in per_chunk))
+        all_mentions = list(chain.from_iterable(p[1] for p in per_chunk))
+        return all_entities, all_mentions
+
+    async def _embed_and_store(
+        self,
+        tenant_id: str,
+        chunks: list[DocumentChunk],
+    ) -> int:
+        """
+        Embed chunks and upsert each batch as soon as it is ready.
+        
+        Only the last upsert waits for Qdrant to apply it; writes are applied
+        in order, so the document is searchable once this returns.
+        """
+        count = 0
+        previous = previous_sparse = None
+        async for batch, embeddings in self.embedder.embed_chunks_stream(chunks):
+            if previous:
+                count += await self.vector_store.upsert(
+                    tenant_id, previous, wait=False, sparse_embeddings=previous_sparse
+                )
+            previous = list(zip(batch, embeddings))
+            previous_sparse = await self._sparse_embed(batch)
+        if previous:
+            count += await self.vector_store.upsert(
+                tenant_id, previous, sparse_embeddings=previous_sparse
+            )
+        return count
+
+    async def _sparse_embed(self, chunks: list[DocumentChunk]) -> list | None:
+        """Sparse vectors for a batch of chunks, or None without hybrid search."""
+        if self.sparse_embedder is None:
+            return None
+        return await self.sparse_embedder.embed_texts([chunk.content for chunk in chunks])
+
+    def _needs_parsing(self, document: RawDocument) -> bool:
+        """
+        Check whether a document has to go through the parser.
+        
+        Connectors can flag pre-cleaned bodies with metadata["already_clean"].
+        Short Slack messages without markup are plain text already.
+        """
+        if document.metadata.get("already_clean"):
+            return False
+        if (
+            document.source == DataSource.SLACK
+            and len(document.body) <= PRECLEAN_MAX_CHARS
+            and "<" not in document.body
+        ):
+            return False
+        return True
+
     async def ingest_batch(
         self,
         documents: list[RawDocument],
@@ -187,6 +278,9 @@ class IngestionOrchestrator:
         """
         Ingest a batch of documents with controlled concurrency.
         
+        Tenant document counts are left to the caller, which owns the DB
+        session (TenantService.record_indexed).
+        
         Args:
             documents: List of raw documents
             max_concurrent: Maximum concurrent ingestions
@@ -194,8 +288,6 @@ class IngestionOrchestrator:
         Returns:
             List of IndexedDocument results
         """
-        import asyncio
-        
         semaphore = asyncio.Semaphore(max_concurrent)
         
         async def bounded_ingest(doc: RawDocument) -> IndexedDocument:
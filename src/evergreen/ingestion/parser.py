@@ -54,13 +54,8 @@ class DocumentParser:
             else:
                 cleaned_body = self._parse_generic(document.body)
             
-            # Create new document with cleaned body
-            return RawDocument(
-                **{
-                    **document.model_dump(),
-                    "body": cleaned_body,
-                }
-            )
+            # Shallow copy with cleaned body; participants/metadata are shared
+            return document.model_copy(update={"body": cleaned_body})
             
         except Exception as e:
             logger.error(
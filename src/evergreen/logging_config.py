@@ -0,0 +1,58 @@
+"""
+Structured logging configuration.
+
+Configures structlog with a level filter and an orjson-backed JSON renderer.
+"""
+
+import logging
+from enum import Enum
+from typing import Any
+
+import orjson
+import structlog
+
+from evergreen.config import settings
+
+
+def _default(obj: Any) -> Any:
+    """Serialize types orjson doesn't handle natively."""
+    if isinstance(obj, Enum):
+        return obj.value
+    return str(obj)
+
+
+def _dumps(event_dict: dict[str, Any], **kwargs: Any) -> bytes:
+    """orjson serializer for structlog's JSONRenderer."""
+    return orjson.dumps(event_dict, default=_default)
+
+
+def configure_logging() -> None:
+    """
+    Configure structlog for the application.
+
+    Log calls below settings.log_level are dropped by the bound logger
+    before any processor runs. Outside development, events are rendered
+    as JSON bytes by orjson; development keeps the console renderer.
+    """
+    processors: list[Any] = [
+        structlog.contextvars.merge_contextvars,
+        structlog.processors.add_log_level,
+        structlog.processors.TimeStamper(fmt="iso"),
+        structlog.processors.format_exc_info,
+    ]
+
+    if settings.is_development:
+        processors.append(structlog.dev.ConsoleRenderer())
+        logger_factory: Any = structlog.PrintLoggerFactory()
+    else:
+        processors.append(structlog.processors.JSONRenderer(serializer=_dumps))
+        logger_factory = structlog.BytesLoggerFactory()
+
+    structlog.configure(
+        processors=processors,
+        wrapper_class=structlog.make_filtering_bound_logger(
+            logging.getLevelName(settings.log_level)
+        ),
+        logger_factory=logger_factory,
+        cache_logger_on_first_use=True,
+    )
@@ -2,14 +2,18 @@
 Core data models for Evergreen.
 
 Pydantic models representing documents, entities, and other domain objects.
+Hot-path internal records (chunks, mentions) are slotted dataclasses since they
+are built by trusted code and never need re-validation.
 """
 
+import sys
+from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
 from typing import Any
 from uuid import UUID, uuid4
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 
 
 # =============================================================================
@@ -46,6 +50,19 @@ class DocumentStatus(str, Enum):
     FAILED = "failed"
 
 
+# Value -> member lookups so validators resolve enums with a single dict probe.
+# Member values are interned so repeated source/type strings share one object.
+_DATASOURCE_BY_VALUE: dict[str, DataSource] = {
+    sys.intern(m.value): m for m in DataSource
+}
+_ENTITY_TYPE_BY_VALUE: dict[str, EntityType] = {
+    sys.intern(m.value): m for m in EntityType
+}
+_DOCUMENT_STATUS_BY_VALUE: dict[str, DocumentStatus] = {
+    sys.intern(m.value): m for m in DocumentStatus
+}
+
+
 # =============================================================================
 # Base Models
 # =============================================================================
@@ -85,16 +102,22 @@ class RawDocument(BaseModel):
     timestamp: datetime
     metadata: dict[str, Any] = Field(default_factory=dict)
 
+    @field_validator("source", mode="before")
+    @classmethod
+    def _lookup_source(cls, v: Any) -> Any:
+        return _DATASOURCE_BY_VALUE.get(v, v) if isinstance(v, str) else v
 
-class DocumentChunk(BaseModel):
+
+@dataclass(slots=True, frozen=True, kw_only=True)
+class DocumentChunk:
     """A chunk of a document ready for embedding."""
-    id: str = Field(default_factory=lambda: str(uuid4()))
+    id: str = field(default_factory=lambda: str(uuid4()))
     document_id: str
     tenant_id: UUID
     content: str
     chunk_index: int
     token_count: int
-    metadata: dict[str, Any] = Field(default_factory=dict)
+    metadata: dict[str, Any] = field(default_factory=dict)
 
 
 class IndexedDocument(TenantModel):
@@ -110,6 +133,16 @@ class IndexedDocument(TenantModel):
     indexed_at: datetime | None = None
     error_message: str | None = None
 
+    @field_validator("source", mode="before")
+    @classmethod
+    def _lookup_source(cls, v: Any) -> Any:
+        return _DATASOURCE_BY_VALUE.get(v, v) if isinstance(v, str) else v
+
+    @field_validator("status", mode="before")
+    @classmethod
+    def _lookup_status(cls, v: Any) -> Any:
+        return _DOCUMENT_STATUS_BY_VALUE.get(v, v) if isinstance(v, str) else v
+
 
 # =============================================================================
 # Entity Models
@@ -132,8 +165,14 @@ class Entity(TenantModel):
     last_seen: datetime = Field(default_factory=datetime.utcnow)
     mention_count: int = 1
 
+    @field_validator("type", mode="before")
+    @classmethod
+    def _lookup_type(cls, v: Any) -> Any:
+        return _ENTITY_TYPE_BY_VALUE.get(v, v) if isinstance(v, str) else v
+
 
-class EntityMention(BaseModel):
+@dataclass(slots=True, frozen=True, kw_only=True)
+class EntityMention:
     """A mention of an entity in a document."""
     entity_id: str
     document_id: str
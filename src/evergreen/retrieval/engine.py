@@ -8,19 +8,99 @@ Implements a hybrid RAG approach:
 4. LLM synthesis for final answer
 """
 
+import asyncio
+import hashlib
+import io
+import re
+import time
+from collections import OrderedDict
+from collections.abc import AsyncIterator
 from dataclasses import dataclass, field
+from functools import lru_cache
 from typing import Any
 from uuid import UUID
 
+import numpy as np
 import structlog
 
 from evergreen.config import settings
-from evergreen.storage.embeddings import get_embedding_generator
+from evergreen.storage.embeddings import (
+    get_embedding_generator,
+    get_sparse_embedding_generator,
+)
 from evergreen.storage.vector import VectorStore
 from evergreen.storage.graph import GraphStore
 
 logger = structlog.get_logger()
 
+# Query embeddings shared by all engines in the process (engines are per-request):
+# sha256(tenant_id, normalized query) -> (expires_at, embedding)
+_query_embedding_cache: OrderedDict[str, tuple[float, list[float]]] = OrderedDict()
+
+
+
+@lru_cache(maxsize=1)
+def _cohere_client():
+    """Shared Cohere client so all engines reuse one connection pool."""
+    import cohere
+    return cohere.AsyncClient(api_key=settings.cohere_api_key)
+
+
+@lru_cache(maxsize=1)
+def _llm_client():
+    """Shared Anthropic client so all engines reuse one connection pool."""
+    import anthropic
+    return anthropic.AsyncAnthropic(api_key=settings.anthropic_api_key)
+
+
+async def close_clients() -> None:
+    """Close the shared API clients. Call on application shutdown."""
+    if _cohere_client.cache_info().currsize:
+        await _cohere_client().close()
+        _cohere_client.cache_clear()
+    if _llm_client.cache_info().currsize:
+        await _llm_client().close()
+        _llm_client.cache_clear()
+
+
+# Relevance weight for MMR diversification when Cohere reranking is off
+MMR_LAMBDA = 0.7
+
+# Characters of each chunk sent to the reranker (its effective window)
+RERANK_MAX_CHARS = 2048
+
+NO_SOURCES_ANSWER = "I couldn't find relevant information to answer your question."
+SYNTHESIS_FAILED_ANSWER = (
+    "I found relevant information but had trouble summarizing it. Please try again."
+)
+
+# Static parts of the synthesis prompt; only context and query vary per call
+PROMPT_HEAD = """You are an AI assistant helping users find information in their organization's data.
+
+Based on the following context, answer the user's question. Be specific and cite source numbers [1], [2], etc.
+
+Context:
+"""
+PROMPT_MID = """
+
+User Question: """
+PROMPT_TAIL = """
+
+Instructions:
+- Answer based ONLY on the provided context
+- Cite sources using [1], [2], etc.
+- If the context doesn't contain enough information, say so
+- Be concise but complete
+
+Answer:"""
+
+# Answers that admit missing information get low confidence
+_LOW_CONF_RE = re.compile(r"don't have enough|cannot find|no relevant", re.IGNORECASE)
+LOW_CONFIDENCE = 0.3
+
+# Confidence lost when the answer was cut off at max_tokens
+TRUNCATED_PENALTY = 0.2
+
 
 @dataclass
 class QueryResult:
@@ -59,6 +139,7 @@ class RetrievalEngine:
         graph_store: GraphStore | None = None,
         embedding_generator=None,
         rerank: bool = True,
+        sparse_embedding_generator=None,
     ):
         """
         Initialize retrieval engine.
@@ -68,37 +149,33 @@ class RetrievalEngine:
             graph_store: Graph store instance
             embedding_generator: Embedding generator
             rerank: Whether to use Cohere reranking
+            sparse_embedding_generator: Sparse generator for hybrid search
+                (defaults to the shared one, if configured)
         """
         self.vector_store = vector_store or VectorStore()
         self.graph_store = graph_store or GraphStore()
         self.embedding_generator = embedding_generator or get_embedding_generator(
             use_local=not settings.voyage_api_key
         )
+        self.sparse_embedding_generator = (
+            sparse_embedding_generator or get_sparse_embedding_generator()
+        )
         self.use_rerank = rerank and settings.cohere_api_key
         
-        self._cohere_client = None
-        self._llm_client = None
-        
         logger.info(
             "Retrieval engine initialized",
             reranking=self.use_rerank,
         )
 
     def _get_cohere_client(self):
-        """Lazy load Cohere client."""
-        if self._cohere_client is None and settings.cohere_api_key:
-            import cohere
-            self._cohere_client = cohere.AsyncClient(api_key=settings.cohere_api_key)
-        return self._cohere_client
+        """Get the shared Cohere client (None if not configured)."""
+        if not settings.cohere_api_key:
+            return None
+        return _cohere_client()
 
     def _get_llm_client(self):
-        """Lazy load Anthropic client."""
-        if self._llm_client is None:
-            import anthropic
-            self._llm_client = anthropic.AsyncAnthropic(
-                api_key=settings.anthropic_api_key
-            )
-        return self._llm_client
+        """Get the shared Anthropic client."""
+        return _llm_client()
 
     async def query(
         self,
@@ -108,6 +185,7 @@ class RetrievalEngine:
         filters: dict[str, Any] | None = None,
         include_graph: bool = True,
         synthesize: bool = True,
+        expansions: list[str] | None = None,
     ) -> QueryResult:
         """
         Execute a query against the knowledge base.
@@ -119,60 +197,224 @@ class RetrievalEngine:
             filters: Optional metadata filters
             include_graph: Whether to include graph traversal
             synthesize: Whether to synthesize answer with LLM
+            expansions: Optional query rewrites / hypothetical documents,
+                embedded in the same batch as the query and searched alongside it
             
         Returns:
             QueryResult with answer and sources
         """
+        vector_results, entities = await self._retrieve(
+            tenant_id, query, top_k, filters, include_graph, expansions
+        )
+        
+        # Step 5: Synthesize answer
+        if synthesize:
+            answer, reasoning, confidence = await self._synthesize_answer(
+                query, vector_results, entities
+            )
+        else:
+            answer = ""
+            reasoning = None
+            confidence = 0.0
+        
+        return QueryResult(
+            answer=answer,
+            sources=vector_results,
+            entities=entities,
+            confidence=confidence,
+            reasoning=reasoning,
+        )
+
+    async def query_stream(
+        self,
+        tenant_id: str,
+        query: str,
+        top_k: int = 10,
+        filters: dict[str, Any] | None = None,
+        include_graph: bool = True,
+        expansions: list[str] | None = None,
+    ) -> AsyncIterator[dict[str, Any]]:
+        """
+        Execute a query and stream the synthesized answer.
+        
+        Yields a "sources" event first (sources and entities), then one
+        "answer" event per text delta from the LLM.
+        
+        Args:
+            tenant_id: Tenant identifier
+            query: Natural language query
+            top_k: Number of results to retrieve
+            filters: Optional metadata filters
+            include_graph: Whether to include graph traversal
+            expansions: Optional query expansions (see query)
+            
+        Yields:
+            Event dicts with a "type" key ("sources" or "answer")
+        """
+        vector_results, entities = await self._retrieve(
+            tenant_id, query, top_k, filters, include_graph, expansions
+        )
+        
+        yield {"type": "sources", "sources": vector_results, "entities": entities}
+        
+        if not vector_results:
+            yield {"type": "answer", "text": NO_SOURCES_ANSWER}
+            return
+        
+        try:
+            async for text in self._stream_answer(query, vector_results, entities):
+                yield {"type": "answer", "text": text}
+        except Exception as e:
+            logger.error("LLM synthesis failed", error=str(e))
+            yield {"type": "answer", "text": SYNTHESIS_FAILED_ANSWER}
+
+    async def _retrieve(
+        self,
+        tenant_id: str,
+        query: str,
+        top_k: int,
+        filters: dict[str, Any] | None,
+        include_graph: bool,
+        expansions: list[str] | None,
+    ) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+        """
+        Run the retrieval stages (embed, search, rerank, graph).
+        
+        Returns:
+            Tuple of (sources, entities)
+        """
         logger.info(
             "Processing query",
             tenant_id=tenant_id,
             query=query[:100],
         )
         
-        # Step 1: Embed the query
-        query_embedding = await self.embedding_generator.embed_query(query)
+        # Step 1: Embed the query (and any expansions in one batch), plus
+        # sparse vectors for hybrid search when configured
+        queries = [query, *expansions] if expansions else [query]
+        query_embeddings, sparse_embeddings = await asyncio.gather(
+            self._embed_dense_queries(tenant_id, queries),
+            self._embed_sparse_queries(queries),
+        )
         
-        # Step 2: Vector search
-        vector_results = await self.vector_store.search(
+        # Step 2: Vector search (all query variants in one round trip)
+        search_results = await self.vector_store.search_batch(
             tenant_id=tenant_id,
-            query_embedding=query_embedding,
+            query_embeddings=query_embeddings,
             limit=top_k * 2,  # Get more for reranking
             filters=filters,
+            with_vectors=not self.use_rerank,  # For MMR diversity
+            sparse_embeddings=sparse_embeddings,
         )
+        vector_results = self._merge_search_results(search_results)
         
         logger.debug(
             "Vector search complete",
             result_count=len(vector_results),
         )
         
-        # Step 3: Optional reranking
+        # Step 3: Rerank with Cohere, or diversify locally with MMR
         if self.use_rerank and vector_results:
             vector_results = await self._rerank(query, vector_results, top_k)
         else:
-            vector_results = vector_results[:top_k]
+            vector_results = self._mmr_rerank(query_embeddings[0], vector_results, top_k)
         
         # Step 4: Graph augmentation
         entities = []
         if include_graph and vector_results:
             entities = await self._augment_with_graph(tenant_id, vector_results)
         
-        # Step 5: Synthesize answer
-        if synthesize:
-            answer, reasoning, confidence = await self._synthesize_answer(
-                query, vector_results, entities
-            )
-        else:
-            answer = ""
-            reasoning = None
-            confidence = 0.0
+        return vector_results, entities
+
+    async def _embed_dense_queries(
+        self,
+        tenant_id: str,
+        queries: list[str],
+    ) -> list[list[float]]:
+        """Embed the query alone through the cache, or all variants in one batch."""
+        if len(queries) > 1:
+            return await self._embed_queries(queries)
+        return [await self._embed_query_cached(tenant_id, queries[0])]
+
+    async def _embed_sparse_queries(self, queries: list[str]) -> list[Any] | None:
+        """Sparse query vectors for hybrid search, or None if not configured."""
+        if self.sparse_embedding_generator is None:
+            return None
+        return await self.sparse_embedding_generator.embed_queries(queries)
+
+    async def _embed_query_cached(self, tenant_id: str, query: str) -> list[float]:
+        """
+        Embed a query, reusing recent embeddings of the same query.
         
-        return QueryResult(
-            answer=answer,
-            sources=vector_results,
-            entities=entities,
-            confidence=confidence,
-            reasoning=reasoning,
+        Args:
+            tenant_id: Tenant identifier
+            query: Natural language query
+            
+        Returns:
+            Query embedding vector
+        """
+        normalized = query.strip().lower()
+        key = hashlib.sha256(f"{tenant_id}\0{normalized}".encode()).hexdigest()
+        now = time.monotonic()
+        
+        cached = _query_embedding_cache.get(key)
+        if cached is not None:
+            expires_at, embedding = cached
+            if expires_at > now:
+                _query_embedding_cache.move_to_end(key)
+                return embedding
+            del _query_embedding_cache[key]
+        
+        embedding = await self.embedding_generator.embed_query(query)
+        
+        _query_embedding_cache[key] = (
+            now + settings.query_embedding_cache_ttl_seconds,
+            embedding,
+        )
+        while len(_query_embedding_cache) > settings.query_embedding_cache_size:
+            _query_embedding_cache.popitem(last=False)
+        
+        return embedding
+
+    async def _embed_queries(self, queries: list[str]) -> list[list[float]]:
+        """
+        Embed several query variants in a single batch call.
+        
+        Texts are sent longest-first so local models pad less per batch;
+        embeddings are returned in the original order.
+        
+        Args:
+            queries: Query texts
+            
+        Returns:
+            One embedding per query, in input order
+        """
+        order = sorted(range(len(queries)), key=lambda i: len(queries[i]), reverse=True)
+        embedded = await self.embedding_generator.embed_texts(
+            [queries[i] for i in order], input_type="query"
         )
+        
+        embeddings: list[list[float]] = [[] for _ in queries]
+        for pos, i in enumerate(order):
+            embeddings[i] = embedded[pos]
+        return embeddings
+
+    def _merge_search_results(
+        self,
+        search_results: list[list[dict[str, Any]]],
+    ) -> list[dict[str, Any]]:
+        """Merge result lists, keeping each chunk's best score, ordered by score."""
+        if len(search_results) == 1:
+            return search_results[0]
+        
+        best: dict[Any, dict[str, Any]] = {}
+        for results in search_results:
+            for result in results:
+                current = best.get(result["id"])
+                if current is None or result["score"] > current["score"]:
+                    best[result["id"]] = result
+        
+        return sorted(best.values(), key=lambda r: r["score"], reverse=True)
 
     async def _rerank(
         self,
@@ -191,11 +433,25 @@ class RetrievalEngine:
         Returns:
             Reranked results
         """
+        if len(results) <= top_k:
+            # Nothing would be dropped; keep vector order and skip the API call
+            logger.debug("Reranking skipped", rerank_skipped=True)
+            return results
+        
         cohere = self._get_cohere_client()
         if not cohere:
             return results[:top_k]
         
-        documents = [r["content"] for r in results]
+        # Send each distinct document once, truncated to the rerank window
+        documents = []
+        original_index = []
+        seen_documents = set()
+        for i, r in enumerate(results):
+            document = (r["content"] or "")[:RERANK_MAX_CHARS]
+            if document not in seen_documents:
+                seen_documents.add(document)
+                documents.append(document)
+                original_index.append(i)
         
         try:
             rerank_response = await cohere.rerank(
@@ -207,7 +463,7 @@ class RetrievalEngine:
             
             reranked = []
             for item in rerank_response.results:
-                result = results[item.index].copy()
+                result = results[original_index[item.index]].copy()
                 result["rerank_score"] = item.relevance_score
                 reranked.append(result)
             
@@ -218,6 +474,53 @@ class RetrievalEngine:
             logger.warning("Reranking failed, using original order", error=str(e))
             return results[:top_k]
 
+    def _mmr_rerank(
+        self,
+        query_embedding: list[float],
+        results: list[dict[str, Any]],
+        top_k: int,
+        lambda_: float = MMR_LAMBDA,
+    ) -> list[dict[str, Any]]:
+        """
+        Select a relevant but diverse top_k with Maximal Marginal Relevance.
+        
+        All similarities come from two matrix products over the returned
+        embeddings; the greedy loop only keeps a running max per candidate.
+        
+        Args:
+            query_embedding: Query vector
+            results: Vector search results with "embedding" keys
+            top_k: Number to keep
+            lambda_: Relevance/diversity trade-off (1.0 = pure relevance)
+            
+        Returns:
+            Selected results, without their embeddings
+        """
+        embeddings = [r.pop("embedding", None) for r in results]
+        if len(results) <= top_k or any(e is None for e in embeddings):
+            return results[:top_k]
+        
+        doc_matrix = np.asarray(embeddings, dtype=np.float32)
+        doc_matrix /= np.linalg.norm(doc_matrix, axis=1, keepdims=True).clip(min=1e-12)
+        query_vec = np.asarray(query_embedding, dtype=np.float32)
+        query_vec /= max(float(np.linalg.norm(query_vec)), 1e-12)
+        
+        sim_query = doc_matrix @ query_vec
+        sim_docs = doc_matrix @ doc_matrix.T
+        
+        max_sim_selected = np.zeros(len(results), dtype=np.float32)
+        available = np.ones(len(results), dtype=bool)
+        selected = []
+        for _ in range(top_k):
+            scores = lambda_ * sim_query - (1 - lambda_) * max_sim_selected
+            scores[~available] = -np.inf
+            pick = int(np.argmax(scores))
+            selected.append(pick)
+            available[pick] = False
+            np.maximum(max_sim_selected, sim_docs[pick], out=max_sim_selected)
+        
+        return [results[i] for i in selected]
+
     async def _augment_with_graph(
         self,
         tenant_id: str,
@@ -233,31 +536,19 @@ class RetrievalEngine:
         Returns:
             List of related entities
         """
-        # Extract unique document IDs
-        doc_ids = set()
-        for r in results:
-            if doc_id := r.get("document_id"):
-                doc_ids.add(doc_id)
-        
-        # Find entities mentioned in these documents
-        entities = []
-        seen_entities = set()
+        # Extract unique document IDs, best-ranked first
+        doc_ids = list(dict.fromkeys(
+            doc_id for r in results if (doc_id := r.get("document_id"))
+        ))[:5]  # Limit graph fan-out
         
-        for doc_id in list(doc_ids)[:5]:  # Limit graph queries
-            try:
-                # Get entities for this document
-                entity_results = await self.graph_store.find_entities_by_name(
-                    tenant_id, "", limit=10
-                )
-                
-                for entity in entity_results:
-                    entity_id = entity.get("id")
-                    if entity_id and entity_id not in seen_entities:
-                        seen_entities.add(entity_id)
-                        entities.append(entity)
-                        
-            except Exception as e:
-                logger.debug("Graph augmentation error", error=str(e))
+        # Find entities mentioned in these documents (one graph query)
+        try:
+            entities = await self.graph_store.get_document_entities(
+                tenant_id, doc_ids, limit=10 * len(doc_ids)
+            )
+        except Exception as e:
+            logger.debug("Graph augmentation error", error=str(e))
+            entities = []
         
         logger.debug("Graph augmentation complete", entity_count=len(entities))
         return entities
@@ -271,6 +562,8 @@ class RetrievalEngine:
         """
         Synthesize answer using LLM.
         
+        Collects the streamed answer from _stream_answer.
+        
         Args:
             query: Original query
             sources: Retrieved source chunks
@@ -280,74 +573,97 @@ class RetrievalEngine:
             Tuple of (answer, reasoning, confidence)
         """
         if not sources:
-            return (
-                "I couldn't find relevant information to answer your question.",
-                None,
-                0.0,
-            )
+            return NO_SOURCES_ANSWER, None, 0.0
         
-        client = self._get_llm_client()
+        try:
+            completion: dict[str, Any] = {}
+            parts = [
+                text async for text in self._stream_answer(
+                    query, sources, entities, completion
+                )
+            ]
+            answer = "".join(parts)
+            
+            # Estimate confidence based on sources and response
+            if _LOW_CONF_RE.search(answer):
+                confidence = LOW_CONFIDENCE
+            else:
+                confidence = min(0.9, 0.5 + 0.1 * len(sources))
+            if completion.get("stop_reason") == "max_tokens":
+                confidence = max(0.1, confidence - TRUNCATED_PENALTY)
+            
+            return answer, None, confidence
+            
+        except Exception as e:
+            logger.error("LLM synthesis failed", error=str(e))
+            return SYNTHESIS_FAILED_ANSWER, str(e), 0.2
+
+    async def _stream_answer(
+        self,
+        query: str,
+        sources: list[dict[str, Any]],
+        entities: list[dict[str, Any]],
+        completion: dict[str, Any] | None = None,
+    ) -> AsyncIterator[str]:
+        """
+        Stream the LLM answer as text deltas.
         
+        Args:
+            query: Original query
+            sources: Retrieved source chunks (non-empty)
+            entities: Related entities
+            completion: If given, filled with "stop_reason" and
+                "output_tokens" once the stream finishes
+            
+        Yields:
+            Answer text fragments as they are generated
+        """
+        client = self._get_llm_client()
+        prompt = self._build_prompt(query, sources, entities)
+        
+        async with client.messages.stream(
+            model=settings.llm_model,
+            max_tokens=1024,
+            messages=[{"role": "user", "content": prompt}],
+        ) as stream:
+            async for text in stream.text_stream:
+                yield text
+            
+            if completion is not None:
+                message = await stream.get_final_message()
+                completion["stop_reason"] = message.stop_reason
+                completion["output_tokens"] = message.usage.output_tokens
+
+    def _build_prompt(
+        self,
+        query: str,
+        sources: list[dict[str, Any]],
+        entities: list[dict[str, Any]],
+    ) -> str:
+        """Build the synthesis prompt from sources and entities."""
         # Build context from sources
-        context_parts = []
+        buf = io.StringIO()
         for i, source in enumerate(sources, 1):
-            metadata = source.get("metadata", {})
-            context_parts.append(f"""
-[Source {i}]
-Content: {source.get('content', '')}
-Type: {metadata.get('source_type', 'unknown')}
-Date: {metadata.get('created_at', 'unknown')}
-""")
-        
-        context = "\n".join(context_parts)
+            metadata = source.get("metadata") or {}
+            buf.write(f"\n[Source {i}]\nContent: ")
+            buf.write(source.get("content") or "")
+            buf.write("\nType: ")
+            buf.write(str(metadata.get("source_type", "unknown")))
+            buf.write("\nDate: ")
+            buf.write(str(metadata.get("created_at", "unknown")))
+            buf.write("\n")
+        context = buf.getvalue()
         
         # Add entity context
         entity_context = ""
         if entities:
             entity_lines = [f"- {e['name']} ({e['type']})" for e in entities[:10]]
-            entity_context = f"\nRelated entities: {', '.join(e['name'] for e in entities[:10])}"
+            entity_context = "\nRelated entities:\n" + "\n".join(entity_lines)
         
-        prompt = f"""You are an AI assistant helping users find information in their organization's data.
-
-Based on the following context, answer the user's question. Be specific and cite source numbers [1], [2], etc.
-
-Context:
-{context}
-{entity_context}
-
-User Question: {query}
-
-Instructions:
-- Answer based ONLY on the provided context
-- Cite sources using [1], [2], etc.
-- If the context doesn't contain enough information, say so
-- Be concise but complete
-
-Answer:"""
-
-        try:
-            response = await client.messages.create(
-                model=settings.llm_model,
-                max_tokens=1024,
-                messages=[{"role": "user", "content": prompt}],
-            )
-            
-            answer = response.content[0].text
-            
-            # Estimate confidence based on sources and response
-            confidence = min(0.9, 0.5 + 0.1 * len(sources))
-            if "don't have enough" in answer.lower() or "cannot find" in answer.lower():
-                confidence = 0.3
-            
-            return answer, None, confidence
-            
-        except Exception as e:
-            logger.error("LLM synthesis failed", error=str(e))
-            return (
-                "I found relevant information but had trouble summarizing it. Please try again.",
-                str(e),
-                0.2,
-            )
+        return (
+            PROMPT_HEAD + context + "\n" + entity_context
+            + PROMPT_MID + query + PROMPT_TAIL
+        )
 
     async def find_similar_documents(
         self,
@@ -364,26 +680,22 @@ Answer:"""
             top_k: Number of similar documents
             
         Returns:
-            List of similar documents
+            List of similar documents, each represented by its best chunk
         """
-        # Get chunks for this document
-        results = await self.vector_store.search(
-            tenant_id=tenant_id,
-            query_embedding=[0.0] * self.embedding_generator.dimensions,  # Placeholder
-            limit=1,
-            filters={"document_id": document_id},
+        # Fetch a chunk of this document by payload filter (no vector math)
+        chunk = await self.vector_store.get_chunk_by_document_id(
+            tenant_id, document_id, with_content=False
         )
         
-        if not results:
+        if not chunk or not chunk.get("embedding"):
             return []
         
-        # Use first chunk's embedding to find similar
-        # This is a simplified approach
-        return await self.vector_store.search(
+        # Use its stored embedding to find the closest other documents
+        return await self.vector_store.search_documents(
             tenant_id=tenant_id,
-            query_embedding=results[0].get("embedding", []),
+            query_embedding=chunk["embedding"],
             limit=top_k,
-            filters=None,  # Don't filter, want other documents
+            exclude={"document_id": document_id},
         )
 
     async def get_entity_context(
@@ -414,14 +726,10 @@ Answer:"""
         entity = entities[0]
         entity_id = entity["id"]
         
-        # Get subgraph
-        subgraph = await self.graph_store.get_entity_subgraph(
-            tenant_id, entity_id, depth=2
-        )
-        
-        # Get related documents
-        doc_ids = await self.graph_store.get_entity_documents(
-            tenant_id, entity_id, limit=10
+        # Get subgraph and related documents concurrently
+        subgraph, doc_ids = await asyncio.gather(
+            self.graph_store.get_entity_subgraph(tenant_id, entity_id, depth=2),
+            self.graph_store.get_entity_documents(tenant_id, entity_id, limit=10),
         )
         
         return {
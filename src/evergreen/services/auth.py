@@ -4,18 +4,19 @@ Authentication service.
 Handles login, registration, and token management.
 """
 
+from datetime import datetime, timezone
 from uuid import UUID
 
 import structlog
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from evergreen.auth.jwt import (
-    create_access_token,
-    create_refresh_token,
     decode_token,
+    sign_pair,
     verify_token_type,
     TokenError,
 )
+from evergreen.auth.revocation import is_user_stale
 from evergreen.config import settings
 from evergreen.auth.schemas import TokenPair
 from evergreen.db.models import User
@@ -85,11 +86,12 @@ class AuthService:
         )
         
         # Generate tokens
-        tokens = self._create_tokens(user)
+        uid = str(user.id)
+        tokens = self._create_tokens(user, uid)
         
         logger.info(
             "User registered",
-            user_id=str(user.id),
+            user_id=uid,
             tenant_id=str(tenant.id),
             is_new_tenant=tenant_id is None,
         )
@@ -114,9 +116,10 @@ class AuthService:
         if not user:
             raise ValueError("Invalid email or password")
         
-        tokens = self._create_tokens(user)
+        uid = str(user.id)
+        tokens = self._create_tokens(user, uid)
         
-        logger.info("User logged in", user_id=str(user.id))
+        logger.info("User logged in", user_id=uid)
         return user, tokens
 
     async def refresh(self, refresh_token: str) -> TokenPair:
@@ -127,7 +130,7 @@ class AuthService:
             refresh_token: Valid refresh token
             
         Returns:
-            New token pair
+            New token pair, expiring no later than refresh_token
             
         Raises:
             ValueError: If refresh token is invalid
@@ -140,32 +143,71 @@ class AuthService:
         if not verify_token_type(token_data, "refresh"):
             raise ValueError("Invalid token type - expected refresh token")
         
+        # Claims are enough unless the user was deactivated or changed role
+        # since; tokens issued before email/role were embedded need the DB too.
+        # Either way the new pair expires with the exchanged token, so a
+        # session lasts refresh_token_expire_days from login whichever path
+        # (and whether Redis was reachable) served each refresh
+        stale = await is_user_stale(token_data.sub)
+        if stale is False and token_data.email:
+            tokens = self._issue_tokens(
+                user_id=token_data.sub,
+                tenant_id=token_data.tenant_id,
+                email=token_data.email,
+                role=token_data.role,
+                expires_at=token_data.exp,
+            )
+            logger.info("Token refreshed", user_id=token_data.sub)
+            return tokens
+        
         # Get user to verify still active
         user = await self.user_service.get(UUID(token_data.sub))
         if not user or not user.is_active:
             raise ValueError("User not found or inactive")
         
-        tokens = self._create_tokens(user)
+        tokens = self._create_tokens(user, token_data.sub, expires_at=token_data.exp)
         
         logger.info("Token refreshed", user_id=token_data.sub)
         return tokens
 
-    def _create_tokens(self, user: User) -> TokenPair:
-        """Create access and refresh token pair for user."""
-        access_token = create_access_token(
-            user_id=str(user.id),
+    def _create_tokens(
+        self,
+        user: User,
+        uid: str | None = None,
+        expires_at: datetime | None = None,
+    ) -> TokenPair:
+        """Create access and refresh token pair for user (uid is str(user.id))."""
+        return self._issue_tokens(
+            user_id=uid or str(user.id),
             tenant_id=user.tenant_id,
             email=user.email,
             role=user.role,
+            expires_at=expires_at,
         )
-        
-        refresh_token = create_refresh_token(
-            user_id=str(user.id),
-            tenant_id=user.tenant_id,
+
+    def _issue_tokens(
+        self,
+        user_id: str,
+        tenant_id: UUID,
+        email: str,
+        role: str,
+        expires_at: datetime | None = None,
+    ) -> TokenPair:
+        """Create access and refresh token pair from user claims."""
+        access_token, refresh_token = sign_pair(
+            user_id=user_id,
+            tenant_id=tenant_id,
+            email=email,
+            role=role,
+            expires_at=expires_at,
         )
         
+        expires_in = settings.access_token_expire_minutes * 60
+        if expires_at is not None:
+            remaining = (expires_at - datetime.now(timezone.utc)).total_seconds()
+            expires_in = min(expires_in, max(int(remaining), 0))
         return TokenPair(
             access_token=access_token,
             refresh_token=refresh_token,
-            expires_in=settings.access_token_expire_minutes * 60,
+            expires_in=expires_in,
         )
@@ -2,16 +2,29 @@
 Tenant management service.
 """
 
+from collections import Counter
+from collections.abc import AsyncIterator, Iterable
 from uuid import UUID
 
 import structlog
-from sqlalchemy import select
+from sqlalchemy import case, select, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
+from evergreen.config import settings
 from evergreen.db.models import Tenant
+from evergreen.models import DocumentStatus, IndexedDocument
+from evergreen.services.cache import TTLCache
 
 logger = structlog.get_logger()
 
+# slug -> tenant_id. Only ids are cached; rows always come from the session.
+_slug_cache = TTLCache(settings.lookup_cache_size, settings.lookup_cache_ttl_seconds)
+
+# Rows fetched per round-trip when streaming lists
+LIST_BATCH_SIZE = 100
+
 
 class TenantService:
     """Service for tenant CRUD operations."""
@@ -39,38 +52,78 @@ class TenantService:
             raise ValueError(f"Tenant with slug '{slug}' already exists")
         
         tenant = Tenant(name=name, slug=slug)
-        self.db.add(tenant)
-        await self.db.flush()
+        
+        # A concurrent create can still win the race; the unique constraint
+        # catches it and the savepoint keeps the rest of the transaction usable
+        try:
+            async with self.db.begin_nested():
+                self.db.add(tenant)
+        except IntegrityError as e:
+            raise ValueError(f"Tenant with slug '{slug}' already exists") from e
         
         logger.info("Tenant created", tenant_id=str(tenant.id), slug=slug)
         return tenant
 
-    async def get(self, tenant_id: UUID) -> Tenant | None:
-        """Get tenant by ID."""
-        return await self.db.get(Tenant, tenant_id)
+    async def get(
+        self,
+        tenant_id: UUID,
+        with_connections: bool = False,
+    ) -> Tenant | None:
+        """
+        Get tenant by ID.
+        
+        Args:
+            tenant_id: Tenant to fetch
+            with_connections: Eager-load tenant.connections
+        """
+        options = [selectinload(Tenant.connections)] if with_connections else None
+        return await self.db.get(Tenant, tenant_id, options=options)
 
     async def get_by_slug(self, slug: str) -> Tenant | None:
-        """Get tenant by slug."""
+        """Get tenant by slug (slug -> id is cached briefly)."""
+        tenant_id = _slug_cache.get(slug)
+        if tenant_id is not None:
+            tenant = await self.db.get(Tenant, tenant_id)
+            if tenant is not None:
+                return tenant
+            _slug_cache.pop(slug)
+        
         result = await self.db.execute(
             select(Tenant).where(Tenant.slug == slug)
         )
-        return result.scalar_one_or_none()
+        tenant = result.scalar_one_or_none()
+        if tenant is not None:
+            _slug_cache.set(slug, tenant.id)
+        return tenant
 
     async def list(
         self,
-        limit: int = 50,
+        limit: int | None = 50,
         offset: int = 0,
         active_only: bool = True,
-    ) -> list[Tenant]:
-        """List all tenants."""
-        query = select(Tenant)
+    ) -> AsyncIterator[Tenant]:
+        """
+        Stream tenants (connections eager-loaded) in batches of LIST_BATCH_SIZE.
+        
+        Args:
+            limit: Maximum tenants to return (None for all)
+            offset: Number of tenants to skip
+            active_only: Skip soft-deleted tenants
+            
+        Yields:
+            Tenants, newest first
+        """
+        query = select(Tenant).options(selectinload(Tenant.connections))
         if active_only:
             query = query.where(Tenant.is_active == True)
         query = query.order_by(Tenant.created_at.desc())
         query = query.limit(limit).offset(offset)
         
-        result = await self.db.execute(query)
-        return list(result.scalars().all())
+        result = await self.db.stream_scalars(
+            query.execution_options(yield_per=LIST_BATCH_SIZE)
+        )
+        async for tenant in result:
+            yield tenant
 
     async def update(
         self,
@@ -116,12 +169,51 @@ class TenantService:
         
         tenant.is_active = False
         await self.db.flush()
+        _slug_cache.pop(tenant.slug)
         logger.info("Tenant deleted", tenant_id=str(tenant_id))
         return True
 
     async def increment_documents(self, tenant_id: UUID, count: int = 1) -> None:
-        """Increment document count for tenant."""
-        tenant = await self.get(tenant_id)
-        if tenant:
-            tenant.documents_indexed += count
-            await self.db.flush()
+        """Increment document count for tenant (single atomic UPDATE)."""
+        await self.db.execute(
+            update(Tenant)
+            .where(Tenant.id == tenant_id)
+            .values(documents_indexed=Tenant.documents_indexed + count)
+        )
+
+    async def increment_documents_many(self, counts: dict[UUID, int]) -> None:
+        """
+        Increment document counts for several tenants in one UPDATE.
+        
+        Args:
+            counts: Increment per tenant ID
+        """
+        if not counts:
+            return
+        
+        await self.db.execute(
+            update(Tenant)
+            .where(Tenant.id.in_(counts))
+            .values(
+                documents_indexed=Tenant.documents_indexed
+                + case(counts, value=Tenant.id, else_=0)
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+    async def record_indexed(self, documents: Iterable[IndexedDocument]) -> None:
+        """
+        Count a batch of ingestion results towards their tenants.
+        
+        Call with the results of IngestionOrchestrator.ingest_batch; all
+        tenants are updated in one UPDATE within this session's transaction.
+        
+        Args:
+            documents: Ingestion results; only indexed documents are counted
+        """
+        counts = Counter(
+            document.tenant_id
+            for document in documents
+            if document.status == DocumentStatus.INDEXED
+        )
+        await self.increment_documents_many(dict(counts))
@@ -2,18 +2,34 @@
 User management service.
 """
 
-from datetime import datetime, timezone
+import asyncio
+from collections.abc import AsyncIterator
+from datetime import datetime, timedelta, timezone
 from uuid import UUID
 
 import structlog
 from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from evergreen.auth.password import hash_password, verify_password
+from evergreen.auth.revocation import mark_user_stale
+from evergreen.config import settings
 from evergreen.db.models import User
+from evergreen.services.cache import TTLCache
 
 logger = structlog.get_logger()
 
+# last_login_at is only rewritten when older than this, so repeated logins
+# don't issue an UPDATE on the users table every time
+LAST_LOGIN_UPDATE_INTERVAL = timedelta(minutes=5)
+
+# Rows fetched per round-trip when streaming lists
+LIST_BATCH_SIZE = 100
+
+# email -> user_id. Only ids are cached; rows always come from the session.
+_email_cache = TTLCache(settings.lookup_cache_size, settings.lookup_cache_ttl_seconds)
+
 
 class UserService:
     """Service for user CRUD operations."""
@@ -45,7 +61,7 @@ class UserService:
         Raises:
             ValueError: If email already exists
         """
-        # Check email uniqueness
+        # Check email uniqueness before paying for the password hash
         existing = await self.get_by_email(email)
         if existing:
             raise ValueError(f"User with email '{email}' already exists")
@@ -53,12 +69,19 @@ class UserService:
         user = User(
             tenant_id=tenant_id,
             email=email.lower(),
-            hashed_password=hash_password(password),
+            hashed_password=await asyncio.to_thread(hash_password, password),
             name=name,
             role=role,
         )
-        self.db.add(user)
-        await self.db.flush()
+        
+        # A concurrent registration can still win the race; the unique
+        # constraint catches it and the savepoint keeps the rest of the
+        # transaction usable
+        try:
+            async with self.db.begin_nested():
+                self.db.add(user)
+        except IntegrityError as e:
+            raise ValueError(f"User with email '{email}' already exists") from e
         
         logger.info(
             "User created",
@@ -73,11 +96,22 @@ class UserService:
         return await self.db.get(User, user_id)
 
     async def get_by_email(self, email: str) -> User | None:
-        """Get user by email."""
+        """Get user by email (email -> id is cached briefly)."""
+        email = email.lower()
+        user_id = _email_cache.get(email)
+        if user_id is not None:
+            user = await self.db.get(User, user_id)
+            if user is not None:
+                return user
+            _email_cache.pop(email)
+        
         result = await self.db.execute(
-            select(User).where(User.email == email.lower())
+            select(User).where(User.email == email)
         )
-        return result.scalar_one_or_none()
+        user = result.scalar_one_or_none()
+        if user is not None:
+            _email_cache.set(email, user.id)
+        return user
 
     async def authenticate(self, email: str, password: str) -> User | None:
         """
@@ -98,13 +132,21 @@ class UserService:
             logger.warning("Login attempt for inactive user", email=email)
             return None
         
-        if not verify_password(password, user.hashed_password):
+        # bcrypt is CPU-bound; keep it off the event loop
+        if not await asyncio.to_thread(
+            verify_password, password, user.hashed_password
+        ):
             logger.warning("Invalid password", email=email)
             return None
         
-        # Update last login
-        user.last_login_at = datetime.now(timezone.utc)
-        await self.db.flush()
+        # Update last login (debounced)
+        now = datetime.now(timezone.utc)
+        if (
+            user.last_login_at is None
+            or now - user.last_login_at > LAST_LOGIN_UPDATE_INTERVAL
+        ):
+            user.last_login_at = now
+            await self.db.flush()
         
         logger.info("User authenticated", user_id=str(user.id), email=email)
         return user
@@ -112,18 +154,30 @@ class UserService:
     async def list_by_tenant(
         self,
         tenant_id: UUID,
-        limit: int = 50,
+        limit: int | None = 50,
         offset: int = 0,
-    ) -> list[User]:
-        """List users for a tenant."""
-        result = await self.db.execute(
+    ) -> AsyncIterator[User]:
+        """
+        Stream users for a tenant in batches of LIST_BATCH_SIZE.
+        
+        Args:
+            tenant_id: Tenant whose users to list
+            limit: Maximum users to return (None for all)
+            offset: Number of users to skip
+            
+        Yields:
+            Users, newest first
+        """
+        result = await self.db.stream_scalars(
             select(User)
             .where(User.tenant_id == tenant_id)
             .order_by(User.created_at.desc())
             .limit(limit)
             .offset(offset)
+            .execution_options(yield_per=LIST_BATCH_SIZE)
         )
-        return list(result.scalars().all())
+        async for user in result:
+            yield user
 
     async def update(
         self,
@@ -139,11 +193,21 @@ class UserService:
             
         Returns:
             Updated user or None if not found
+            
+        Raises:
+            RedisError: If role or is_active changed and the stale marker
+                couldn't be written; the update is rolled back with the
+                session rather than leaving old claims refreshable
         """
         user = await self.get(user_id)
         if not user:
             return None
         
+        # Only a real change of role or active state invalidates token claims
+        claims_changed = any(
+            key in updates and getattr(user, key) != updates[key]
+            for key in ("role", "is_active")
+        )
         allowed_fields = {"name", "role", "is_active"}
         for key, value in updates.items():
             if key in allowed_fields:
@@ -151,10 +215,15 @@ class UserService:
         
         # Special handling for password
         if "password" in updates:
-            user.hashed_password = hash_password(updates["password"])
+            user.hashed_password = await asyncio.to_thread(
+                hash_password, updates["password"]
+            )
         
         await self.db.flush()
-        logger.info("User updated", user_id=str(user_id))
+        uid = str(user_id)
+        if claims_changed:
+            await mark_user_stale(uid)
+        logger.info("User updated", user_id=uid)
         return user
 
     async def delete(self, user_id: UUID) -> bool:
@@ -166,12 +235,21 @@ class UserService:
             
         Returns:
             True if deleted, False if not found
+            
+        Raises:
+            RedisError: If the stale marker couldn't be written; the delete
+                is rolled back with the session
         """
         user = await self.get(user_id)
         if not user:
             return False
         
+        was_active = user.is_active
         user.is_active = False
         await self.db.flush()
-        logger.info("User deleted", user_id=str(user_id))
+        _email_cache.pop(user.email)
+        uid = str(user_id)
+        if was_active:
+            await mark_user_stale(uid)
+        logger.info("User deleted", user_id=uid)
         return True
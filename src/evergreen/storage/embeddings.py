@@ -5,10 +5,20 @@ Handles batching, rate limiting, and fallback options.
 """
 
 import asyncio
-from typing import Any
+import hashlib
+import os
+import random
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from operator import attrgetter
+from collections import OrderedDict, deque
+from collections.abc import AsyncIterator
+from typing import Any, Literal
 
+import numpy as np
 import structlog
 import voyageai
+from qdrant_client import models
 from tenacity import retry, stop_after_attempt, wait_exponential
 
 from evergreen.config import settings
@@ -17,19 +27,42 @@ from evergreen.models import DocumentChunk
 logger = structlog.get_logger()
 
 
+def _estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token)."""
+    return len(text) // 4 + 1
+
+
+_chunk_content = attrgetter("content")
+
+
+# Content hash -> embedding (float32), shared by all Voyage generators in the
+# process so repeated boilerplate (signatures, footers) is embedded once
+_embedding_cache: OrderedDict[bytes, np.ndarray] = OrderedDict()
+
+
 class EmbeddingGenerator:
     """
     Generates embeddings using Voyage AI.
     
     Features:
-    - Automatic batching for efficiency
+    - Automatic batching under both the text and token limits
+    - Concurrent batch requests (bounded by settings.embedding_concurrency)
     - Rate limit handling with exponential backoff
+    - Content-hash cache so identical texts are embedded once
     - Configurable model and dimensions
     """
 
     # Voyage AI limits
     MAX_BATCH_SIZE = 128  # Max texts per request
     MAX_TOKENS_PER_BATCH = 320000  # ~2500 tokens per text average
+    
+    # Random delay before each request so concurrent batches don't hit
+    # the rate limiter in lockstep
+    REQUEST_JITTER_SECONDS = 0.05
+    
+    # Finished batches that embed_chunks_stream may buffer ahead of its
+    # consumer before it stops dispatching new ones
+    STREAM_BUFFER_BATCHES = 4
 
     def __init__(
         self,
@@ -53,6 +86,7 @@ class EmbeddingGenerator:
             raise ValueError("Voyage AI API key not configured")
         
         self._client = voyageai.AsyncClient(api_key=self.api_key)
+        self._semaphore = asyncio.Semaphore(settings.embedding_concurrency)
         
         logger.info(
             "Embedding generator initialized",
@@ -78,15 +112,46 @@ class EmbeddingGenerator:
         if not texts:
             return []
         
-        # Process in batches
-        all_embeddings = []
+        keys = [self._cache_key(text, input_type) for text in texts]
+        embeddings = [self._cache_get(key) for key in keys]
+        
+        # Uncached texts, each sent once however often it repeats
+        missing: dict[bytes, list[int]] = {}
+        for i, embedding in enumerate(embeddings):
+            if embedding is None:
+                missing.setdefault(keys[i], []).append(i)
         
-        for i in range(0, len(texts), self.MAX_BATCH_SIZE):
-            batch = texts[i:i + self.MAX_BATCH_SIZE]
-            batch_embeddings = await self._embed_batch(batch, input_type)
-            all_embeddings.extend(batch_embeddings)
+        if missing:
+            positions = list(missing.values())
+            fresh = await self._embed_uncached(
+                [texts[indices[0]] for indices in positions], input_type
+            )
+            for indices, embedding in zip(positions, fresh):
+                self._cache_put(keys[indices[0]], embedding)
+                for i in indices:
+                    embeddings[i] = embedding
         
-        return all_embeddings
+        return embeddings
+
+    async def _embed_uncached(
+        self,
+        texts: list[str],
+        input_type: str,
+    ) -> list[list[float]]:
+        """Embed texts through the API, in packed concurrent batches."""
+        # Process batches concurrently, writing each into its slice of the output
+        bounds = self._pack_batches([_estimate_tokens(text) for text in texts])
+        results = await asyncio.gather(
+            *[
+                self._embed_batch_bounded(texts[start:end], input_type)
+                for start, end in bounds
+            ]
+        )
+        
+        embeddings: list[Any] = [None] * len(texts)
+        for (start, end), result in zip(bounds, results):
+            embeddings[start:end] = result
+        return embeddings
 
     async def embed_chunks(
         self,
@@ -101,10 +166,99 @@ class EmbeddingGenerator:
         Returns:
             List of (chunk, embedding) tuples
         """
-        texts = [chunk.content for chunk in chunks]
-        embeddings = await self.embed_texts(texts, input_type="document")
+        pairs = []
+        async for batch, embeddings in self.embed_chunks_stream(chunks):
+            pairs.extend(zip(batch, embeddings))
+        return pairs
+
+    async def embed_chunks_stream(
+        self,
+        chunks: list[DocumentChunk],
+    ) -> AsyncIterator[tuple[list[DocumentChunk], list[list[float]]]]:
+        """
+        Generate embeddings for document chunks one API batch at a time.
         
-        return list(zip(chunks, embeddings))
+        Lets callers hand each batch to storage while later ones embed.
+        At most embedding_concurrency + STREAM_BUFFER_BATCHES batches are
+        in flight or waiting, so a slow consumer applies backpressure instead
+        of letting results pile up in memory.
+        
+        Chunks whose content is already cached come first, as one batch.
+        
+        Args:
+            chunks: List of document chunks
+            
+        Yields:
+            (chunk_batch, embeddings) pairs; uncached chunks in input order
+        """
+        keys = {}
+        hits: list[tuple[DocumentChunk, list[float]]] = []
+        misses: list[DocumentChunk] = []
+        # Later chunks with the same content as a miss reuse its embedding
+        duplicates: dict[bytes, list[DocumentChunk]] = {}
+        for chunk in chunks:
+            key = keys[chunk.id] = self._cache_key(chunk.content, "document")
+            embedding = self._cache_get(key)
+            if embedding is not None:
+                hits.append((chunk, embedding))
+            elif key in duplicates:
+                duplicates[key].append(chunk)
+            else:
+                duplicates[key] = []
+                misses.append(chunk)
+        
+        if hits:
+            logger.debug("Embedding cache hits", count=len(hits))
+            yield [chunk for chunk, _ in hits], [embedding for _, embedding in hits]
+        
+        batches = [
+            misses[start:end]
+            for start, end in self._pack_batches(
+                [
+                    chunk.token_count or _estimate_tokens(chunk.content)
+                    for chunk in misses
+                ]
+            )
+        ]
+        window = settings.embedding_concurrency + self.STREAM_BUFFER_BATCHES
+        pending: deque[tuple[list[DocumentChunk], asyncio.Task]] = deque()
+        try:
+            for batch in batches:
+                pending.append((
+                    batch,
+                    asyncio.create_task(
+                        self._embed_batch_bounded(
+                            list(map(_chunk_content, batch)), "document"
+                        )
+                    ),
+                ))
+                if len(pending) >= window:
+                    done, task = pending.popleft()
+                    yield self._complete_batch(done, await task, keys, duplicates)
+            while pending:
+                done, task = pending.popleft()
+                yield self._complete_batch(done, await task, keys, duplicates)
+        finally:
+            for _, task in pending:
+                task.cancel()
+
+    def _complete_batch(
+        self,
+        batch: list[DocumentChunk],
+        embeddings: list[list[float]],
+        keys: dict[Any, bytes],
+        duplicates: dict[bytes, list[DocumentChunk]],
+    ) -> tuple[list[DocumentChunk], list[list[float]]]:
+        """Cache a finished batch and add the duplicate chunks it covers."""
+        chunks = list(batch)
+        vectors = list(embeddings)
+        for chunk, embedding in zip(batch, embeddings):
+            key = keys[chunk.id]
+            self._cache_put(key, embedding)
+            for duplicate in duplicates.get(key, ()):
+                chunks.append(duplicate)
+                vectors.append(embedding)
+        return chunks, vectors
 
     async def embed_query(self, query: str) -> list[float]:
         """
@@ -119,6 +273,66 @@ class EmbeddingGenerator:
         embeddings = await self.embed_texts([query], input_type="query")
         return embeddings[0]
 
+    def _cache_key(self, text: str, input_type: str) -> bytes:
+        """Content hash of a text under this model's output space."""
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(f"{self.model}\0{self.dimensions}\0{input_type}\0".encode())
+        digest.update(text.encode())
+        return digest.digest()
+
+    def _cache_get(self, key: bytes) -> list[float] | None:
+        """Look up a cached embedding."""
+        embedding = _embedding_cache.get(key)
+        if embedding is None:
+            return None
+        _embedding_cache.move_to_end(key)
+        return embedding.tolist()
+
+    def _cache_put(self, key: bytes, embedding: list[float]) -> None:
+        """Cache an embedding, evicting the least recently used."""
+        _embedding_cache[key] = np.asarray(embedding, dtype=np.float32)
+        while len(_embedding_cache) > settings.embedding_cache_size:
+            _embedding_cache.popitem(last=False)
+
+    def _pack_batches(self, token_counts: list[int]) -> list[tuple[int, int]]:
+        """
+        Greedily split inputs into batches under both API limits.
+        
+        Batches stay contiguous, so concatenating their results preserves
+        input order. A single text over the token limit gets its own batch.
+        
+        Args:
+            token_counts: Token count per input
+            
+        Returns:
+            (start, end) slice bounds for each batch
+        """
+        bounds = []
+        start = 0
+        batch_tokens = 0
+        for i, tokens in enumerate(token_counts):
+            if i > start and (
+                i - start == self.MAX_BATCH_SIZE
+                or batch_tokens + tokens > self.MAX_TOKENS_PER_BATCH
+            ):
+                bounds.append((start, i))
+                start = i
+                batch_tokens = 0
+            batch_tokens += tokens
+        if start < len(token_counts):
+            bounds.append((start, len(token_counts)))
+        return bounds
+
+    async def _embed_batch_bounded(
+        self,
+        texts: list[str],
+        input_type: str,
+    ) -> list[list[float]]:
+        """Embed a batch once a concurrency slot is free."""
+        async with self._semaphore:
+            await asyncio.sleep(random.uniform(0, self.REQUEST_JITTER_SECONDS))
+            return await self._embed_batch(texts, input_type)
+
     @retry(
         stop=stop_after_attempt(5),
         wait=wait_exponential(multiplier=1, min=2, max=60),
@@ -174,6 +388,11 @@ class LocalEmbeddingGenerator:
         self,
         model_name: str = "BAAI/bge-m3",
         device: str = "auto",
+        batch_size: int = 64,
+        dtype: str | None = None,
+        backend: Literal["torch", "onnx", "openvino"] = "torch",
+        onnx_file: str | None = None,
+        num_threads: int | None = None,
     ):
         """
         Initialize local embedding generator.
@@ -181,6 +400,18 @@ class LocalEmbeddingGenerator:
         Args:
             model_name: HuggingFace model name
             device: Device to use (auto, cuda, cpu, mps)
+            batch_size: Texts per forward pass
+            dtype: Weight precision on CUDA (float32, float16, bfloat16, auto;
+                auto picks bfloat16 where supported, else float16). Defaults
+                to settings.local_embedding_dtype
+            backend: Inference runtime. "onnx" and "openvino" run an exported,
+                graph-optimized copy of the model and are usually faster on CPU
+                (needs sentence-transformers>=3.2 with the onnx/openvino extra)
+            onnx_file: ONNX file to load, e.g. "onnx/model_O3.onnx" for an
+                O3-optimized export or "onnx/model_qint8_avx512_vnni.onnx" for
+                an int8-quantized one; exported on the fly when omitted
+            num_threads: Torch intra-op threads on CPU (defaults to
+                min(8, CPU count))
         """
         try:
             from sentence_transformers import SentenceTransformer
@@ -191,6 +422,7 @@ class LocalEmbeddingGenerator:
             )
         
         self.model_name = model_name
+        self.batch_size = batch_size
         
         # Determine device
         if device == "auto":
@@ -202,13 +434,55 @@ class LocalEmbeddingGenerator:
             else:
                 device = "cpu"
         
-        self._model = SentenceTransformer(model_name, device=device)
+        # Torch's default CPU thread pool is often wrong in containers
+        if device == "cpu" and backend == "torch":
+            import torch
+            num_threads = num_threads or min(8, os.cpu_count() or 4)
+            torch.set_num_threads(num_threads)
+            try:
+                torch.set_num_interop_threads(1)
+            except RuntimeError:
+                # Only settable before torch runs its first parallel op
+                pass
+        
+        # Only pass backend options when asked for, so the default path
+        # keeps working on sentence-transformers 2.x
+        backend_kwargs: dict[str, Any] = {}
+        if backend != "torch":
+            model_kwargs: dict[str, Any] = {}
+            if backend == "onnx":
+                model_kwargs["provider"] = (
+                    "CUDAExecutionProvider" if device == "cuda"
+                    else "CPUExecutionProvider"
+                )
+            if onnx_file:
+                model_kwargs["file_name"] = onnx_file
+            backend_kwargs = {"backend": backend, "model_kwargs": model_kwargs}
+        
+        self.backend = backend
+        # One worker: encode calls serialize on the model anyway, and a private
+        # pool keeps them from queueing behind unrelated blocking work
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embed")
+        self._model = SentenceTransformer(model_name, device=device, **backend_kwargs)
         self.dimensions = self._model.get_sentence_embedding_dimension()
         
+        # Half precision on CUDA only when configured; _encode normalizes
+        # in float32
+        dtype = dtype or settings.local_embedding_dtype
+        self.dtype = "float32"
+        if backend == "torch" and device == "cuda" and dtype != "float32":
+            import torch
+            if dtype == "auto":
+                dtype = "bfloat16" if torch.cuda.is_bf16_supported() else "float16"
+            self._model.to(getattr(torch, dtype))
+            self.dtype = dtype
+        
         logger.info(
             "Local embedding generator initialized",
             model=model_name,
             device=device,
+            backend=backend,
+            dtype=self.dtype,
             dimensions=self.dimensions,
         )
 
@@ -216,35 +490,148 @@ class LocalEmbeddingGenerator:
         self,
         texts: list[str],
         input_type: str = "document",
-    ) -> list[list[float]]:
-        """Generate embeddings locally."""
+    ) -> np.ndarray:
+        """Generate embeddings locally as a (len(texts), dimensions) array."""
         if not texts:
-            return []
+            return np.empty((0, self.dimensions), dtype=np.float32)
         
-        # sentence-transformers is sync, run in thread pool
-        loop = asyncio.get_event_loop()
-        embeddings = await loop.run_in_executor(
-            None,
-            lambda: self._model.encode(texts, normalize_embeddings=True).tolist()
-        )
+        # Encode each distinct text once, then expand back to every position
+        unique = {text: i for i, text in enumerate(dict.fromkeys(texts))}
+        
+        # sentence-transformers is sync, run it on the model's own thread
+        loop = asyncio.get_running_loop()
+        embeddings = await loop.run_in_executor(self._executor, self._encode, list(unique))
         
+        if len(unique) < len(texts):
+            embeddings = embeddings[[unique[text] for text in texts]]
+        return embeddings
+
+    def _encode(self, texts: list[str]) -> np.ndarray:
+        """
+        Encode texts sorted by length, then restore input order.
+        
+        Similar-length texts share a batch, so little compute goes to padding.
+        """
+        import torch
+        
+        order = np.argsort([len(text) for text in texts], kind="stable")
+        with torch.inference_mode():
+            encoded = self._model.encode(
+                [texts[i] for i in order],
+                batch_size=self.batch_size,
+                normalize_embeddings=False,
+                convert_to_numpy=True,
+                show_progress_bar=False,
+            )
+        # L2-normalize once over the whole array, in place and in float32
+        encoded = encoded.astype(np.float32, copy=False)
+        norms = np.linalg.norm(encoded, axis=1, keepdims=True)
+        np.divide(encoded, norms.clip(min=1e-12), out=encoded)
+        embeddings = np.empty_like(encoded)
+        embeddings[order] = encoded
         return embeddings
 
     async def embed_chunks(
         self,
         chunks: list[DocumentChunk],
-    ) -> list[tuple[DocumentChunk, list[float]]]:
-        """Generate embeddings for document chunks."""
-        texts = [chunk.content for chunk in chunks]
-        embeddings = await self.embed_texts(texts)
+    ) -> list[tuple[DocumentChunk, np.ndarray]]:
+        """Generate embeddings for document chunks (one array row each)."""
+        embeddings = await self.embed_texts(list(map(_chunk_content, chunks)))
         return list(zip(chunks, embeddings))
 
-    async def embed_query(self, query: str) -> list[float]:
+    async def embed_chunks_stream(
+        self,
+        chunks: list[DocumentChunk],
+    ) -> AsyncIterator[tuple[list[DocumentChunk], np.ndarray]]:
+        """Generate embeddings for document chunks (single local batch)."""
+        if chunks:
+            embeddings = await self.embed_texts(list(map(_chunk_content, chunks)))
+            yield chunks, embeddings
+
+    async def embed_query(self, query: str) -> np.ndarray:
         """Generate embedding for a search query."""
         embeddings = await self.embed_texts([query], input_type="query")
         return embeddings[0]
 
 
+class SparseEmbeddingGenerator:
+    """
+    Sparse lexical embeddings (BM25 or SPLADE) using fastembed.
+    
+    Feeds the "text" sparse index of each tenant collection so searches
+    can fuse keyword and semantic matches.
+    """
+
+    def __init__(self, model_name: str | None = None):
+        """
+        Initialize sparse embedding generator.
+        
+        Args:
+            model_name: fastembed sparse model (defaults to settings), e.g.
+                "Qdrant/bm25" or "prithivida/Splade_PP_en_v1"
+        """
+        try:
+            from fastembed import SparseTextEmbedding
+        except ImportError:
+            raise ImportError(
+                "fastembed required for sparse embeddings. "
+                "Install with: pip install fastembed"
+            )
+        
+        self.model_name = model_name or settings.sparse_embedding_model
+        self._model = SparseTextEmbedding(self.model_name)
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="sparse-embed"
+        )
+        
+        logger.info("Sparse embedding generator initialized", model=self.model_name)
+
+    async def embed_texts(self, texts: list[str]) -> list[models.SparseVector]:
+        """Generate sparse document vectors, one per text."""
+        if not texts:
+            return []
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, self._encode, self._model.embed, texts
+        )
+
+    async def embed_queries(self, queries: list[str]) -> list[models.SparseVector]:
+        """Generate sparse vectors for search queries, one per query."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, self._encode, self._model.query_embed, queries
+        )
+
+    async def embed_query(self, query: str) -> models.SparseVector:
+        """Generate a sparse vector for a search query."""
+        vectors = await self.embed_queries([query])
+        return vectors[0]
+
+    def _encode(self, embed: Any, texts: list[str]) -> list[models.SparseVector]:
+        """Run a fastembed embedding function and convert its output."""
+        return [
+            models.SparseVector(
+                indices=embedding.indices.tolist(),
+                values=embedding.values.tolist(),
+            )
+            for embedding in embed(texts)
+        ]
+
+
+@lru_cache(maxsize=1)
+def get_sparse_embedding_generator() -> SparseEmbeddingGenerator | None:
+    """
+    Get the shared sparse embedding generator.
+    
+    Returns:
+        Generator for settings.sparse_embedding_model, or None when hybrid
+        search is not configured
+    """
+    if not settings.sparse_embedding_model:
+        return None
+    return SparseEmbeddingGenerator()
+
+
 def get_embedding_generator(
     use_local: bool = False,
     **kwargs,
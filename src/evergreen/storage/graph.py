@@ -4,17 +4,93 @@ Graph storage using FalkorDB.
 Handles entity and relationship storage for knowledge graph queries.
 """
 
+import re
+from collections import OrderedDict
 from typing import Any
 
 import structlog
-from falkordb import FalkorDB as FalkorDBClient
-from redis.asyncio import Redis
+from falkordb.asyncio import FalkorDB as FalkorDBClient
+from redis.asyncio import BlockingConnectionPool
 
 from evergreen.config import settings
-from evergreen.models import Entity, Relationship
+from evergreen.models import Entity, EntityMention, Relationship
 
 logger = structlog.get_logger()
 
+# Variable-length patterns can't take a parameter for their bound, so the
+# depth is inlined into the query and clamped to this range
+MAX_SUBGRAPH_DEPTH = 5
+
+SCHEMA_QUERIES = (
+    "CREATE INDEX FOR (e:Entity) ON (e.id)",
+    "CREATE INDEX FOR (e:Entity) ON (e.name)",
+    "CREATE INDEX FOR (e:Entity) ON (e.type)",
+    "CREATE INDEX FOR (d:Document) ON (d.id)",
+    "CALL db.idx.fulltext.createNodeIndex('Entity', 'name')",
+)
+
+# Graphs whose indices were already ensured by this process
+_schema_ensured: set[str] = set()
+
+# Metadata value types that can be stored as node/edge properties
+_SCALAR_TYPES = frozenset({str, int, float, bool})
+
+
+# Characters RediSearch parses as query syntax; escaped to match literally
+_FULLTEXT_SPECIAL_RE = re.compile(r"""([,.<>{}\[\]"':;!@#$%^&*()\-+=~|/\\?])""")
+
+
+def _fulltext_query(pattern: str) -> str:
+    """
+    Turn user input into a full-text query matching its words literally.
+    
+    The last word is matched as a prefix, so partially typed names
+    ("Lov") still find "Lovelace".
+    """
+    words = [_FULLTEXT_SPECIAL_RE.sub(r"\\\1", word) for word in pattern.split()]
+    if words:
+        words[-1] += "*"
+    return " ".join(words)
+
+
+def _scalar_props(metadata: dict[str, Any]) -> dict[str, Any]:
+    """Keep only metadata values storable as graph properties."""
+    return {k: v for k, v in metadata.items() if type(v) in _SCALAR_TYPES}
+
+
+# Graph handles kept per client (least recently used are dropped first)
+MAX_CACHED_GRAPHS = 1024
+
+# One client (and connection pool) per FalkorDB server, shared by every
+# GraphStore in the process, plus that client's graph handles
+_clients: dict[tuple[str, int], FalkorDBClient] = {}
+_graph_handles: dict[tuple[str, int], OrderedDict[str, Any]] = {}
+
+
+def _shared_client(host: str, port: int) -> FalkorDBClient:
+    """Get or create the process-wide client for a FalkorDB server."""
+    key = (host, port)
+    client = _clients.get(key)
+    if client is None:
+        pool = BlockingConnectionPool(
+            host=host,
+            port=port,
+            max_connections=settings.falkordb_max_connections,
+            decode_responses=True,  # FalkorDB's own client default
+        )
+        client = _clients[key] = FalkorDBClient(connection_pool=pool)
+        _graph_handles[key] = OrderedDict()
+    return client
+
+
+async def close_graph_clients() -> None:
+    """Release the shared connection pools. Call on application shutdown."""
+    for client in _clients.values():
+        await client.connection.aclose()
+        await client.connection.connection_pool.disconnect()
+    _clients.clear()
+    _graph_handles.clear()
+
 
 class GraphStore:
     """
@@ -42,11 +118,10 @@ class GraphStore:
         self.host = host or settings.falkordb_host
         self.port = port or settings.falkordb_port
         
-        # FalkorDB uses Redis protocol
-        self._client = FalkorDBClient(
-            host=self.host,
-            port=self.port,
-        )
+        # FalkorDB uses Redis protocol; the asyncio client keeps queries
+        # from blocking the event loop. Stores share one warm pool.
+        self._client = _shared_client(self.host, self.port)
+        self._graphs = _graph_handles[(self.host, self.port)]
         
         logger.info(
             "Graph store initialized",
@@ -59,30 +134,64 @@ class GraphStore:
         return f"evergreen_{tenant_id}"
 
     def _get_graph(self, tenant_id: str):
-        """Get graph instance for tenant."""
-        return self._client.select_graph(self._graph_name(tenant_id))
+        """Get graph instance for tenant (cached per tenant)."""
+        graph = self._graphs.get(tenant_id)
+        if graph is None:
+            graph = self._client.select_graph(self._graph_name(tenant_id))
+            self._graphs[tenant_id] = graph
+            if len(self._graphs) > MAX_CACHED_GRAPHS:
+                self._graphs.popitem(last=False)
+        else:
+            self._graphs.move_to_end(tenant_id)
+        return graph
+
+    def _entity_rows(self, entities: list[Entity]) -> list[dict[str, Any]]:
+        """Build UNWIND rows (merge keys + node properties) for entities."""
+        rows = []
+        for entity in entities:
+            data = entity.model_dump(mode="json")
+            props = {
+                "id": data["id"],
+                "name": data["name"],
+                "type": data["type"],
+                "tenant_id": data["tenant_id"],
+            }
+            props.update(_scalar_props(data["metadata"]))
+            rows.append({"name": data["name"], "type": data["type"], "props": props})
+        return rows
 
     async def ensure_schema(self, tenant_id: str) -> None:
         """
         Ensure graph schema exists for tenant.
         
-        Creates indices for efficient queries.
+        Creates indices for efficient queries. All index statements go out in
+        one pipelined round-trip, and later calls for the same tenant are
+        no-ops.
         
         Args:
             tenant_id: Tenant identifier
         """
-        graph = self._get_graph(tenant_id)
+        graph_name = self._graph_name(tenant_id)
+        if graph_name in _schema_ensured:
+            return
         
         # Create indices for entity lookups
         try:
-            graph.query("CREATE INDEX FOR (e:Entity) ON (e.id)")
-            graph.query("CREATE INDEX FOR (e:Entity) ON (e.name)")
-            graph.query("CREATE INDEX FOR (e:Entity) ON (e.type)")
-            graph.query("CREATE INDEX FOR (d:Document) ON (d.id)")
-            logger.info("Graph schema created", tenant_id=tenant_id)
+            async with self._client.connection.pipeline(transaction=False) as pipe:
+                for query in SCHEMA_QUERIES:
+                    pipe.execute_command("GRAPH.QUERY", graph_name, query)
+                results = await pipe.execute(raise_on_error=False)
         except Exception as e:
-            # Indices may already exist
-            logger.debug("Schema creation note", error=str(e))
+            logger.warning("Schema creation failed", tenant_id=tenant_id, error=str(e))
+            return
+        
+        # Errors here mean the index already exists
+        for result in results:
+            if isinstance(result, Exception):
+                logger.debug("Schema creation note", error=str(result))
+        
+        _schema_ensured.add(graph_name)
+        logger.info("Graph schema ensured", tenant_id=tenant_id)
 
     async def create_entity(
         self,
@@ -112,9 +221,7 @@ class GraphStore:
         }
         
         # Add metadata as properties
-        for key, value in entity.metadata.items():
-            if isinstance(value, (str, int, float, bool)):
-                props[key] = value
+        props.update(_scalar_props(entity.metadata))
         
         # MERGE on name + type for deduplication
         query = """
@@ -124,7 +231,7 @@ class GraphStore:
         RETURN e.id as id
         """
         
-        result = graph.query(
+        result = await graph.query(
             query,
             params={
                 "name": entity.name,
@@ -141,6 +248,120 @@ class GraphStore:
         
         return str(entity.id)
 
+    async def create_entities_bulk(
+        self,
+        tenant_id: str,
+        entities: list[Entity],
+    ) -> list[str]:
+        """
+        Create or merge many entity nodes in one query.
+        
+        Same semantics as create_entity, but one UNWIND statement (one
+        round-trip, one plan, one transaction) for the whole list.
+        
+        Args:
+            tenant_id: Tenant identifier
+            entities: Entities to create
+            
+        Returns:
+            IDs of the entity nodes as stored in the graph
+        """
+        if not entities:
+            return []
+        
+        graph = self._get_graph(tenant_id)
+        
+        query = """
+        UNWIND $rows AS row
+        MERGE (e:Entity {name: row.name, type: row.type})
+        ON CREATE SET e += row.props
+        ON MATCH SET e.mention_count = COALESCE(e.mention_count, 0) + 1
+        RETURN e.id as id
+        """
+        
+        result = await graph.query(query, params={"rows": self._entity_rows(entities)})
+        
+        logger.debug("Entities created/merged", entity_count=len(entities))
+        
+        return [row[0] for row in result.result_set]
+
+    async def upsert_entities_with_links(
+        self,
+        tenant_id: str,
+        document_id: str,
+        entities: list[Entity],
+        mentions: list[EntityMention] | None = None,
+    ) -> list[str]:
+        """
+        Merge entities and link them to a document in a single query.
+        
+        Equivalent to calling create_entity + link_entities_to_document_bulk,
+        but issues one UNWIND statement (one round-trip, one transaction) for
+        the whole document. Edges are MERGEd on (entity, document, chunk,
+        position) as in link_entities_to_document_bulk, and an entity's
+        mention_count only grows when an edge is created, so re-ingesting a
+        document changes neither.
+        
+        Args:
+            tenant_id: Tenant identifier
+            document_id: Document the entities were extracted from
+            entities: Entities to merge
+            mentions: Where each entity occurs, matched to entities by
+                entity_id; entities without one get a single edge with
+                chunk "" and position -1
+            
+        Returns:
+            IDs of the entity nodes as stored in the graph
+        """
+        if not entities:
+            return []
+        
+        graph = self._get_graph(tenant_id)
+        rows = self._entity_rows(entities)
+        
+        # Mentions reference the extracted entity's ID, which differs from
+        # the stored one when the MERGE matches an existing node, so they
+        # travel in the entity's row instead of being matched by ID
+        links: dict[str, list[dict[str, Any]]] = {}
+        for mention in mentions or []:
+            # start_char is relative to the chunk, so the chunk is part of the key
+            links.setdefault(mention.entity_id, []).append({
+                "chunk_id": mention.chunk_id,
+                "position": mention.start_char,
+                "props": {"mention_text": mention.context} if mention.context else {},
+            })
+        for entity, row in zip(entities, rows):
+            row["mentions"] = links.get(entity.id) or [
+                {"chunk_id": "", "position": -1, "props": {}}
+            ]
+        
+        query = """
+        MERGE (d:Document {id: $doc_id})
+        WITH d
+        UNWIND $rows AS row
+        MERGE (e:Entity {name: row.name, type: row.type})
+        ON CREATE SET e += row.props
+        WITH d, e, row
+        UNWIND row.mentions AS mention
+        MERGE (e)-[r:MENTIONED_IN {chunk_id: mention.chunk_id, position: mention.position}]->(d)
+        ON CREATE SET e.mention_count = COALESCE(e.mention_count, 0) + 1
+        SET r += mention.props
+        RETURN DISTINCT e.id as id
+        """
+        
+        result = await graph.query(
+            query,
+            params={"doc_id": document_id, "rows": rows},
+        )
+        
+        logger.debug(
+            "Entities merged and linked",
+            document_id=document_id,
+            entity_count=len(rows),
+        )
+        
+        return [row[0] for row in result.result_set]
+
     async def create_relationship(
         self,
         tenant_id: str,
@@ -161,13 +382,11 @@ class GraphStore:
         # Build relationship properties
         props = {
             "id": str(relationship.id),
-            "type": relationship.relation_type,
-            "confidence": relationship.confidence,
+            "type": relationship.relationship_type,
+            "strength": relationship.strength,
         }
         
-        for key, value in relationship.metadata.items():
-            if isinstance(value, (str, int, float, bool)):
-                props[key] = value
+        props.update(_scalar_props(relationship.metadata))
         
         # Create relationship between entities
         query = """
@@ -177,7 +396,7 @@ class GraphStore:
         RETURN r.id as id
         """
         
-        result = graph.query(
+        result = await graph.query(
             query,
             params={
                 "source_id": str(relationship.source_entity_id),
@@ -190,11 +409,109 @@ class GraphStore:
             "Relationship created",
             source_id=str(relationship.source_entity_id),
             target_id=str(relationship.target_entity_id),
-            relation_type=relationship.relation_type,
+            relationship_type=relationship.relationship_type,
         )
         
         return str(relationship.id)
 
+    async def create_relationships_bulk(
+        self,
+        tenant_id: str,
+        relationships: list[Relationship],
+    ) -> list[str]:
+        """
+        Create many relationships between entities in one query.
+        
+        Args:
+            tenant_id: Tenant identifier
+            relationships: Relationships to create
+            
+        Returns:
+            Relationship IDs (pairs with a missing endpoint are skipped)
+        """
+        if not relationships:
+            return []
+        
+        graph = self._get_graph(tenant_id)
+        
+        rows = []
+        for relationship in relationships:
+            props = {
+                "id": str(relationship.id),
+                "type": relationship.relationship_type,
+                "strength": relationship.strength,
+            }
+            props.update(_scalar_props(relationship.metadata))
+            rows.append({
+                "source_id": str(relationship.source_entity_id),
+                "target_id": str(relationship.target_entity_id),
+                "props": props,
+            })
+        
+        query = """
+        UNWIND $rows AS row
+        MATCH (source:Entity {id: row.source_id})
+        MATCH (target:Entity {id: row.target_id})
+        CREATE (source)-[r:RELATES_TO]->(target)
+        SET r = row.props
+        RETURN r.id as id
+        """
+        
+        result = await graph.query(query, params={"rows": rows})
+        
+        logger.debug("Relationships created", relationship_count=len(rows))
+        
+        return [row[0] for row in result.result_set]
+
+    async def link_entities_to_document_bulk(
+        self,
+        tenant_id: str,
+        document_id: str,
+        links: list[dict[str, Any]],
+    ) -> None:
+        """
+        Link many entities to their source document in one query.
+        
+        Edges are MERGEd on (entity, document, chunk, position), so
+        re-ingesting a document doesn't duplicate them.
+        
+        Args:
+            tenant_id: Tenant identifier
+            document_id: Document ID
+            links: One dict per mention with "entity_id" and optional
+                "mention_text", "chunk_id" and "position" (relative to the
+                chunk when chunk_id is given)
+        """
+        if not links:
+            return
+        
+        graph = self._get_graph(tenant_id)
+        
+        rows = []
+        for link in links:
+            props = {}
+            if link.get("mention_text"):
+                props["mention_text"] = link["mention_text"]
+            # MERGE keys can't be null; "" and -1 mark "unknown"
+            position = link.get("position")
+            rows.append({
+                "entity_id": link["entity_id"],
+                "chunk_id": link.get("chunk_id") or "",
+                "position": -1 if position is None else position,
+                "props": props,
+            })
+        
+        query = """
+        MERGE (d:Document {id: $doc_id})
+        WITH d
+        UNWIND $rows AS row
+        MATCH (e:Entity {id: row.entity_id})
+        MERGE (e)-[r:MENTIONED_IN {chunk_id: row.chunk_id, position: row.position}]->(d)
+        SET r += row.props
+        """
+        
+        await graph.query(query, params={"doc_id": document_id, "rows": rows})
+
     async def link_entity_to_document(
         self,
         tenant_id: str,
@@ -213,35 +530,14 @@ class GraphStore:
             mention_text: Text where entity was mentioned
             position: Character position in document
         """
-        graph = self._get_graph(tenant_id)
-        
-        # Ensure document node exists
-        doc_query = """
-        MERGE (d:Document {id: $doc_id})
-        RETURN d.id
-        """
-        graph.query(doc_query, params={"doc_id": document_id})
-        
-        # Create mention relationship
-        props = {}
-        if mention_text:
-            props["mention_text"] = mention_text
-        if position is not None:
-            props["position"] = position
-        
-        link_query = """
-        MATCH (e:Entity {id: $entity_id})
-        MATCH (d:Document {id: $doc_id})
-        CREATE (e)-[r:MENTIONED_IN $props]->(d)
-        """
-        
-        graph.query(
-            link_query,
-            params={
+        await self.link_entities_to_document_bulk(
+            tenant_id,
+            document_id,
+            [{
                 "entity_id": entity_id,
-                "doc_id": document_id,
-                "props": props,
-            },
+                "mention_text": mention_text,
+                "position": position,
+            }],
         )
 
     async def get_entity_subgraph(
@@ -249,6 +545,7 @@ class GraphStore:
         tenant_id: str,
         entity_id: str,
         depth: int = 2,
+        limit: int = 100,
     ) -> dict[str, Any]:
         """
         Get subgraph around an entity.
@@ -256,36 +553,32 @@ class GraphStore:
         Args:
             tenant_id: Tenant identifier
             entity_id: Central entity ID
-            depth: How many hops to traverse
+            depth: How many hops to traverse (clamped to 1..MAX_SUBGRAPH_DEPTH)
+            limit: Maximum connected nodes to return
             
         Returns:
             Subgraph with nodes and edges
         """
         graph = self._get_graph(tenant_id)
+        depth = max(1, min(int(depth), MAX_SUBGRAPH_DEPTH))
         
-        query = """
-        MATCH path = (start:Entity {id: $entity_id})-[*1..$depth]-(connected)
-        WITH collect(path) as paths
-        CALL {
-            WITH paths
-            UNWIND paths as p
-            UNWIND nodes(p) as n
-            RETURN collect(DISTINCT n) as nodes
-        }
-        CALL {
-            WITH paths
-            UNWIND paths as p
-            UNWIND relationships(p) as r
-            RETURN collect(DISTINCT r) as edges
-        }
-        RETURN nodes, edges
+        # Dedupe reachable nodes server-side first, then collect the edges on
+        # paths to them, instead of shipping every path to dedupe in Python
+        query = f"""
+        MATCH (start:Entity {{id: $entity_id}})-[*1..{depth}]-(connected)
+        WITH DISTINCT start, connected
+        LIMIT $limit
+        MATCH p = (start)-[*1..{depth}]-(connected)
+        UNWIND relationships(p) AS r
+        WITH start, collect(DISTINCT connected) AS nodes, collect(DISTINCT r) AS edges
+        RETURN [start] + nodes, edges
         """
         
-        result = graph.query(
+        result = await graph.query(
             query,
             params={
                 "entity_id": entity_id,
-                "depth": depth,
+                "limit": limit,
             },
         )
         
@@ -325,9 +618,14 @@ class GraphStore:
         """
         Find entities by name pattern.
         
+        Uses the Entity.name full-text index, matching the pattern's words
+        literally and the last one as a prefix. Falls back to a CONTAINS
+        scan (substring match) when that finds nothing, for an empty pattern,
+        or for a graph whose full-text index doesn't exist yet.
+        
         Args:
             tenant_id: Tenant identifier
-            name_pattern: Name to search (supports CONTAINS)
+            name_pattern: Name to search
             entity_type: Optional type filter
             limit: Maximum results
             
@@ -336,6 +634,26 @@ class GraphStore:
         """
         graph = self._get_graph(tenant_id)
         
+        if name_pattern.strip():
+            query = """
+            CALL db.idx.fulltext.queryNodes('Entity', $pattern) YIELD node
+            WHERE $type IS NULL OR node.type = $type
+            RETURN node
+            LIMIT $limit
+            """
+            params = {
+                "pattern": _fulltext_query(name_pattern),
+                "type": entity_type,
+                "limit": limit,
+            }
+            try:
+                result = await graph.query(query, params=params)
+                entities = self._entity_dicts(result)
+                if entities:
+                    return entities
+            except Exception as e:
+                logger.debug("Full-text entity search unavailable", error=str(e))
+        
         if entity_type:
             query = """
             MATCH (e:Entity)
@@ -353,8 +671,12 @@ class GraphStore:
             """
             params = {"pattern": name_pattern, "limit": limit}
         
-        result = graph.query(query, params=params)
+        result = await graph.query(query, params=params)
         
+        return self._entity_dicts(result)
+
+    def _entity_dicts(self, result) -> list[dict[str, Any]]:
+        """Convert rows whose first column is an Entity node to dicts."""
         return [
             {
                 "id": row[0].properties.get("id"),
@@ -389,13 +711,56 @@ class GraphStore:
         LIMIT $limit
         """
         
-        result = graph.query(
+        result = await graph.query(
             query,
             params={"entity_id": entity_id, "limit": limit},
         )
         
         return [row[0] for row in result.result_set]
 
+    async def get_document_entities(
+        self,
+        tenant_id: str,
+        document_ids: list[str],
+        limit: int = 50,
+    ) -> list[dict[str, Any]]:
+        """
+        Get entities mentioned in any of the given documents.
+        
+        Args:
+            tenant_id: Tenant identifier
+            document_ids: Document IDs
+            limit: Maximum entities
+            
+        Returns:
+            List of distinct entities
+        """
+        if not document_ids:
+            return []
+        
+        graph = self._get_graph(tenant_id)
+        
+        query = """
+        MATCH (e:Entity)-[:MENTIONED_IN]->(d:Document)
+        WHERE d.id IN $doc_ids
+        RETURN DISTINCT e
+        LIMIT $limit
+        """
+        
+        result = await graph.query(
+            query,
+            params={"doc_ids": document_ids, "limit": limit},
+        )
+        
+        return [
+            {
+                "id": row[0].properties.get("id"),
+                "name": row[0].properties.get("name"),
+                "type": row[0].properties.get("type"),
+            }
+            for row in result.result_set
+        ]
+
     async def delete_document_entities(
         self,
         tenant_id: str,
@@ -422,7 +787,7 @@ class GraphStore:
         RETURN count(r) as deleted
         """
         
-        result = graph.query(query, params={"doc_id": document_id})
+        result = await graph.query(query, params={"doc_id": document_id})
         
         deleted = result.result_set[0][0] if result.result_set else 0
         
@@ -447,20 +812,34 @@ class GraphStore:
         """
         graph = self._get_graph(tenant_id)
         
+        # One round trip; each count collapses to a single row before the next
+        # OPTIONAL MATCH, so an empty label still yields 0 rather than no row
+        query = """
+        OPTIONAL MATCH (e:Entity)
+        WITH count(e) AS entities
+        OPTIONAL MATCH (d:Document)
+        WITH entities, count(d) AS documents
+        OPTIONAL MATCH ()-[r]->()
+        RETURN entities, documents, count(r) AS relationships
+        """
+        
         try:
-            entity_result = graph.query("MATCH (e:Entity) RETURN count(e)")
-            doc_result = graph.query("MATCH (d:Document) RETURN count(d)")
-            rel_result = graph.query("MATCH ()-[r]->() RETURN count(r)")
+            result = await graph.query(query)
+            if not result.result_set:
+                return {"entities": 0, "documents": 0, "relationships": 0}
             
+            entities, documents, relationships = result.result_set[0]
             return {
-                "entities": entity_result.result_set[0][0] if entity_result.result_set else 0,
-                "documents": doc_result.result_set[0][0] if doc_result.result_set else 0,
-                "relationships": rel_result.result_set[0][0] if rel_result.result_set else 0,
+                "entities": entities,
+                "documents": documents,
+                "relationships": relationships,
             }
         except Exception:
             return {"entities": 0, "documents": 0, "relationships": 0}
 
-    def close(self) -> None:
-        """Close the client connection."""
-        # FalkorDB client manages connection internally
-        pass
+    async def close(self) -> None:
+        """
+        Release this store.
+        
+        The connection pool is shared; close_graph_clients() releases it.
+        """
@@ -4,17 +4,24 @@ Vector storage using Qdrant.
 Handles document chunk indexing and semantic search.
 """
 
-from typing import Any
+import asyncio
+import time
+from collections import OrderedDict
+from collections.abc import Hashable
+from functools import lru_cache
+from typing import Any, Literal
 from uuid import UUID
 
+import grpc
+import numpy as np
 import structlog
 from qdrant_client import AsyncQdrantClient, models
+from qdrant_client.http.exceptions import UnexpectedResponse
 from qdrant_client.models import (
     Distance,
     FieldCondition,
     Filter,
     MatchValue,
-    PointStruct,
     SearchParams,
     VectorParams,
 )
@@ -24,6 +31,194 @@ from evergreen.models import DocumentChunk
 
 logger = structlog.get_logger()
 
+# Large upsert batches and with_vectors results exceed gRPC's 4 MB default
+MAX_GRPC_MESSAGE_BYTES = 64 << 20
+
+# One client (and gRPC channel pool) per Qdrant server, shared by every
+# VectorStore in the process
+_clients: dict[tuple[str, str | None], AsyncQdrantClient] = {}
+
+
+def _shared_client(url: str, api_key: str | None) -> AsyncQdrantClient:
+    """Get or create the process-wide client for a Qdrant server."""
+    key = (url, api_key)
+    client = _clients.get(key)
+    if client is None:
+        # gRPC multiplexes concurrent requests over HTTP/2 and the pool caps
+        # how many run in parallel
+        client = _clients[key] = AsyncQdrantClient(
+            url=url,
+            api_key=api_key,
+            timeout=60.0,
+            prefer_grpc=settings.qdrant_prefer_grpc,
+            grpc_port=settings.qdrant_grpc_port,
+            grpc_options={
+                "grpc.max_send_message_length": MAX_GRPC_MESSAGE_BYTES,
+                "grpc.max_receive_message_length": MAX_GRPC_MESSAGE_BYTES,
+            },
+            pool_size=settings.qdrant_pool_size,
+        )
+    return client
+
+
+async def close_vector_clients() -> None:
+    """Close the shared Qdrant clients. Call on application shutdown."""
+    for client in _clients.values():
+        await client.close()
+    _clients.clear()
+
+
+def _as_list(vector: list[float] | np.ndarray) -> list[float]:
+    """Convert a numpy embedding row to the list form sent over the wire."""
+    return vector.tolist() if isinstance(vector, np.ndarray) else vector
+
+
+@lru_cache(maxsize=4096)
+def _tenant_collection(tenant_id: str) -> str:
+    """Collection name for a tenant, reused across calls and requests."""
+    return f"evergreen_{tenant_id}"
+
+
+def _is_missing_collection(error: Exception) -> bool:
+    """Whether a Qdrant REST or gRPC error means the collection doesn't exist."""
+    if isinstance(error, UnexpectedResponse):
+        return error.status_code == 404
+    if isinstance(error, grpc.RpcError):
+        return error.code() == grpc.StatusCode.NOT_FOUND
+    return False
+
+
+@lru_cache(maxsize=256)
+def _frozen_filter(items: tuple[tuple[str, Hashable], ...]) -> Filter:
+    """Filter for sorted (field, value) pairs; tuple values match any item."""
+    return Filter(
+        must=[
+            FieldCondition(
+                key=field,
+                # OR condition for list values
+                match=(
+                    models.MatchAny(any=list(value)) if isinstance(value, tuple)
+                    else MatchValue(value=value)
+                ),
+            )
+            for field, value in items
+        ]
+    )
+
+
+def _vector_rows(embeddings: list[list[float] | np.ndarray]) -> list[list[float]]:
+    """Convert embeddings to lists, in one C-level pass when they're numpy rows."""
+    if embeddings and isinstance(embeddings[0], np.ndarray):
+        return np.asarray(embeddings, dtype=np.float32).tolist()
+    return [_as_list(embedding) for embedding in embeddings]
+
+
+def _unit(vector: list[float] | np.ndarray) -> np.ndarray:
+    """L2-normalized float32 copy of a vector."""
+    unit = np.array(vector, dtype=np.float32)
+    unit /= max(float(np.linalg.norm(unit)), 1e-12)
+    return unit
+
+
+class _SearchCache:
+    """
+    Recent search results, reused for near-identical query vectors.
+    
+    Entries are grouped by everything except the query vector (tenant,
+    filters, limit, ...); within a group a lookup hits when a cached query
+    has cosine similarity >= threshold. Groups are evicted LRU once the
+    total entry count passes maxsize. Only touched from the event loop.
+    """
+
+    # Cached queries compared per lookup within one group
+    MAX_GROUP_SIZE = 256
+
+    def __init__(self, maxsize: int, ttl: float, threshold: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.threshold = threshold
+        self._groups: OrderedDict[Hashable, list[tuple[float, np.ndarray, list]]] = (
+            OrderedDict()
+        )
+        self._size = 0
+
+    def get(self, key: Hashable, query: np.ndarray) -> list[dict[str, Any]] | None:
+        """Return copies of the closest cached hits, or None on a miss."""
+        group = self._groups.get(key)
+        if not group:
+            return None
+        
+        now = time.monotonic()
+        live = [entry for entry in group if entry[0] > now]
+        self._size -= len(group) - len(live)
+        if not live:
+            del self._groups[key]
+            return None
+        group[:] = live
+        
+        similarities = np.stack([entry[1] for entry in live]) @ query
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.threshold:
+            return None
+        
+        self._groups.move_to_end(key)
+        return [dict(hit) for hit in live[best][2]]
+
+    def set(self, key: Hashable, query: np.ndarray, hits: list[dict[str, Any]]) -> None:
+        """Cache hits for a query vector."""
+        if self.maxsize <= 0:
+            return
+        group = self._groups.setdefault(key, [])
+        group.append((time.monotonic() + self.ttl, query, [dict(hit) for hit in hits]))
+        self._size += 1
+        if len(group) > self.MAX_GROUP_SIZE:
+            del group[0]
+            self._size -= 1
+        self._groups.move_to_end(key)
+        while self._size > self.maxsize:
+            _, evicted = self._groups.popitem(last=False)
+            self._size -= len(evicted)
+
+    def invalidate(self, tenant_id: str | UUID) -> None:
+        """Drop every cached result for a tenant (keys start with str(tenant_id))."""
+        tenant_id = str(tenant_id)
+        for key in [key for key in self._groups if key[0] == tenant_id]:
+            self._size -= len(self._groups.pop(key))
+
+
+# Named dense vectors used when Matryoshka two-stage search is enabled
+FULL_VECTOR = "full"
+SHORT_VECTOR = "short"
+
+# Chunk metadata keys stored under a different payload name
+_PAYLOAD_KEYS = {"from": "from_email", "to": "to_email"}
+
+# Payload fields indexed in every tenant collection, so filters on them are
+# applied during HNSW traversal instead of after it
+PAYLOAD_INDICES = {
+    "document_id": models.PayloadSchemaType.KEYWORD,
+    "source_type": models.PayloadSchemaType.KEYWORD,
+    "created_at": models.PayloadSchemaType.DATETIME,
+    "thread_id": models.PayloadSchemaType.KEYWORD,
+    "chunk_index": models.PayloadSchemaType.INTEGER,
+    "from_email": models.PayloadSchemaType.KEYWORD,
+    "to_email": models.PayloadSchemaType.KEYWORD,
+}
+
+# Dense vector layout of the collections known to exist, shared by all stores
+# in the process: the size of the "short" Matryoshka prefix vector, or None
+# for a single unnamed vector. Collection lifecycle is admin-controlled, so
+# entries only leave via delete_collection
+_collection_layouts: dict[str, int | None] = {}
+_ensure_lock = asyncio.Lock()
+
+# Shared by all stores in the process (stores are created per request)
+_search_cache = _SearchCache(
+    settings.search_cache_size,
+    settings.search_cache_ttl_seconds,
+    settings.search_cache_similarity,
+)
+
 
 class VectorStore:
     """
@@ -36,6 +231,23 @@ class VectorStore:
     - Automatic collection management
     """
 
+    # Candidates fetched per hybrid stage, as a multiple of the result limit
+    HYBRID_PREFETCH_FACTOR = 4
+    
+    # Search-time HNSW beam width per accuracy level
+    HNSW_EF = {"fast": 64, "balanced": 128, "high": 256}
+    
+    # Shortlist ranked on the short prefix, as a multiple of the result limit
+    MATRYOSHKA_PREFETCH_FACTOR = 8
+    
+    # Collections checked/created at once by bootstrap_tenants
+    BOOTSTRAP_CONCURRENCY = 16
+    
+    # Large upserts are split into requests of this many points, sent
+    # UPSERT_CONCURRENCY at a time
+    UPSERT_BATCH_SIZE = 256
+    UPSERT_CONCURRENCY = 8
+
     def __init__(
         self,
         url: str | None = None,
@@ -53,13 +265,11 @@ class VectorStore:
         self.url = url or settings.qdrant_url
         self.api_key = api_key or settings.qdrant_api_key
         self.dimensions = dimensions or settings.embedding_dimensions
+        # Layout for newly created collections; existing ones keep their own
+        self.short_dimensions = settings.embedding_short_dimensions
         
-        # Initialize async client
-        self._client = AsyncQdrantClient(
-            url=self.url,
-            api_key=self.api_key if self.api_key else None,
-            timeout=60.0,
-        )
+        # Stores are created per request; they share one warm client
+        self._client = _shared_client(self.url, self.api_key or None)
         
         logger.info(
             "Vector store initialized",
@@ -69,67 +279,186 @@ class VectorStore:
 
     def _collection_name(self, tenant_id: str) -> str:
         """Get collection name for a tenant."""
-        return f"evergreen_{tenant_id}"
+        return _tenant_collection(tenant_id)
 
     async def ensure_collection(self, tenant_id: str) -> None:
         """
         Ensure collection exists for tenant.
         
+        Checked against Qdrant once per process; later calls return from
+        the in-process cache without a round trip.
+        
         Args:
             tenant_id: Tenant identifier
         """
+        await self._layout(tenant_id, create=True)
+
+    async def _layout(self, tenant_id: str, create: bool = False) -> int | None:
+        """
+        Get the short vector size of a tenant's collection (None if unnamed).
+        
+        Read from Qdrant once per process, so collections created before
+        embedding_short_dimensions changed keep being written and searched
+        with the layout they were created with.
+        
+        Args:
+            tenant_id: Tenant identifier
+            create: Create the collection if it doesn't exist; otherwise a
+                missing collection is assumed to have the configured layout
+        """
         collection_name = self._collection_name(tenant_id)
+        if collection_name in _collection_layouts:
+            return _collection_layouts[collection_name]
         
-        collections = await self._client.get_collections()
-        existing = [c.name for c in collections.collections]
+        async with _ensure_lock:
+            if collection_name not in _collection_layouts:
+                try:
+                    layout = await self._load_layout(collection_name, create)
+                except Exception as e:
+                    if not _is_missing_collection(e):
+                        raise
+                    # Nothing to search yet; let the query report the miss
+                    return self.short_dimensions
+                _collection_layouts[collection_name] = layout
+            return _collection_layouts[collection_name]
+
+    async def bootstrap_tenants(self, tenant_ids: list[str]) -> None:
+        """
+        Ensure the collections of known tenants exist, concurrently.
         
-        if collection_name not in existing:
-            await self._client.create_collection(
-                collection_name=collection_name,
-                vectors_config=VectorParams(
-                    size=self.dimensions,
-                    distance=Distance.COSINE,
-                ),
-                # Enable sparse vectors for hybrid search
-                sparse_vectors_config={
-                    "text": models.SparseVectorParams(),
-                },
-                # Optimize for filtering
-                optimizers_config=models.OptimizersConfigDiff(
-                    indexing_threshold=20000,
-                ),
-            )
-            
-            # Create payload indices for common filters
-            await self._client.create_payload_index(
-                collection_name=collection_name,
-                field_name="document_id",
-                field_schema=models.PayloadSchemaType.KEYWORD,
+        Run once at startup so upserts for these tenants go straight to
+        Qdrant; tenants added later get their collection on first write.
+        
+        Args:
+            tenant_ids: Tenant identifiers
+        """
+        names = {self._collection_name(tenant_id) for tenant_id in tenant_ids}
+        names -= _collection_layouts.keys()
+        semaphore = asyncio.Semaphore(self.BOOTSTRAP_CONCURRENCY)
+        
+        async def bootstrap(collection_name: str) -> None:
+            async with semaphore:
+                layout = await self._load_layout(collection_name, create=True)
+            _collection_layouts[collection_name] = layout
+        
+        await asyncio.gather(*[bootstrap(name) for name in names])
+        logger.info("Tenant collections bootstrapped", count=len(names))
+
+    async def _load_layout(self, collection_name: str, create: bool) -> int | None:
+        """Read a collection's vector layout, creating the collection if asked."""
+        try:
+            info = await self._client.get_collection(collection_name)
+        except Exception as e:
+            if not (create and _is_missing_collection(e)):
+                raise
+            await self._create_collection(collection_name)
+            return self.short_dimensions
+        
+        vectors = info.config.params.vectors
+        short = vectors.get(SHORT_VECTOR) if isinstance(vectors, dict) else None
+        layout = short.size if short is not None else None
+        if layout != self.short_dimensions:
+            logger.warning(
+                "Collection vector layout differs from settings, keeping it",
+                collection=collection_name,
+                short_dimensions=layout,
             )
-            await self._client.create_payload_index(
+        return layout
+
+    async def _create_collection(self, collection_name: str) -> None:
+        """Create a tenant collection and its payload indices."""
+        await self._client.create_collection(
+            collection_name=collection_name,
+            # Memmapped vectors, graph and payload keep idle tenants out of
+            # RAM; searches run on the in-RAM int8 copies below and only
+            # read the originals to rescore
+            vectors_config=self._vectors_config(),
+            on_disk_payload=settings.qdrant_on_disk,
+            # Enable sparse vectors for hybrid search
+            # (IDF is computed server-side, as BM25 scoring expects)
+            sparse_vectors_config={
+                "text": models.SparseVectorParams(modifier=models.Modifier.IDF),
+            },
+            # Denser graph than the default ef_construct=100 for better recall;
+            # segments under full_scan_threshold KB are searched exactly,
+            # which covers small tenants without a client-side check
+            hnsw_config=models.HnswConfigDiff(
+                m=16,
+                ef_construct=200,
+                full_scan_threshold=10000,
+                on_disk=settings.qdrant_on_disk,
+            ),
+            # int8 copies kept in RAM for traversal (4x smaller than float32);
+            # originals are used to rescore the shortlist
+            quantization_config=models.ScalarQuantization(
+                scalar=models.ScalarQuantizationConfig(
+                    type=models.ScalarType.INT8,
+                    quantile=0.99,
+                    always_ram=True,
+                ),
+            ),
+            # Optimize for filtering
+            optimizers_config=models.OptimizersConfigDiff(
+                indexing_threshold=20000,
+            ),
+        )
+        
+        # Create payload indices for common filters
+        await asyncio.gather(*[
+            self._client.create_payload_index(
                 collection_name=collection_name,
-                field_name="source_type",
-                field_schema=models.PayloadSchemaType.KEYWORD,
+                field_name=field_name,
+                field_schema=field_schema,
             )
-            await self._client.create_payload_index(
-                collection_name=collection_name,
-                field_name="created_at",
-                field_schema=models.PayloadSchemaType.DATETIME,
+            for field_name, field_schema in PAYLOAD_INDICES.items()
+        ])
+        
+        logger.info("Collection created", collection=collection_name)
+
+    def _vectors_config(self) -> VectorParams | dict[str, VectorParams]:
+        """Dense vector layout: one unnamed vector, or short + full."""
+        if not self.short_dimensions:
+            return VectorParams(
+                size=self.dimensions,
+                distance=Distance.COSINE,
+                on_disk=settings.qdrant_on_disk,
             )
-            
-            logger.info("Collection created", collection=collection_name)
+        
+        return {
+            # Only the prefix is traversed, so the full vector needs no graph
+            FULL_VECTOR: VectorParams(
+                size=self.dimensions,
+                distance=Distance.COSINE,
+                on_disk=settings.qdrant_on_disk,
+                hnsw_config=models.HnswConfigDiff(m=0),
+            ),
+            SHORT_VECTOR: VectorParams(
+                size=self.short_dimensions,
+                distance=Distance.COSINE,
+            ),
+        }
 
     async def upsert(
         self,
         tenant_id: str,
-        chunks: list[tuple[DocumentChunk, list[float]]],
+        chunks: list[tuple[DocumentChunk, list[float] | np.ndarray]],
+        wait: bool = True,
+        sparse_embeddings: list[models.SparseVector] | None = None,
     ) -> int:
         """
         Upsert document chunks with embeddings.
         
+        The tenant's collection is created on demand if the write finds it
+        missing.
+        
         Args:
             tenant_id: Tenant identifier
-            chunks: List of (chunk, embedding) tuples
+            chunks: List of (chunk, embedding) tuples; embeddings may be
+                lists or numpy rows
+            sparse_embeddings: Optional sparse vectors for the "text" index,
+                aligned with chunks
+            wait: Wait until Qdrant has applied the write. Bulk loaders can
+                pass False and let the write-ahead log apply batches in order
             
         Returns:
             Number of points upserted
@@ -137,112 +466,407 @@ class VectorStore:
         if not chunks:
             return 0
         
-        await self.ensure_collection(tenant_id)
         collection_name = self._collection_name(tenant_id)
         
-        points = []
-        for chunk, embedding in chunks:
-            # Build payload from chunk metadata
-            payload = {
-                "document_id": chunk.document_id,
-                "tenant_id": chunk.tenant_id,
-                "chunk_index": chunk.chunk_index,
-                "content": chunk.content,
-                "source_type": chunk.metadata.get("source_type", "unknown"),
-                "created_at": chunk.metadata.get("created_at"),
-                "title": chunk.metadata.get("title"),
-                "from_email": chunk.metadata.get("from"),
-                "to_email": chunk.metadata.get("to"),
-                **{k: v for k, v in chunk.metadata.items() if k not in [
-                    "source_type", "created_at", "title", "from", "to"
-                ]},
-            }
-            
-            # Remove None values
-            payload = {k: v for k, v in payload.items() if v is not None}
-            
-            point = PointStruct(
-                id=str(chunk.id),
-                vector=embedding,
-                payload=payload,
+        ids = [str(chunk.id) for chunk, _ in chunks]
+        dense = _vector_rows([embedding for _, embedding in chunks])
+        payloads = [self._payload(chunk) for chunk, _ in chunks]
+        semaphore = asyncio.Semaphore(self.UPSERT_CONCURRENCY)
+        
+        async def send(start: int, wait: bool, short: int | None) -> None:
+            # Columnar batch: one message instead of a PointStruct per chunk.
+            # The fields are built here from typed data, so skip pydantic's
+            # per-float validation of the vectors
+            end = start + self.UPSERT_BATCH_SIZE
+            vectors: Any = dense[start:end]
+            if short or sparse_embeddings is not None:
+                vectors = {FULL_VECTOR if short else "": vectors}
+                if short:
+                    # Cosine distance normalizes, so the raw prefix is enough
+                    vectors[SHORT_VECTOR] = [row[:short] for row in dense[start:end]]
+                if sparse_embeddings is not None:
+                    vectors["text"] = sparse_embeddings[start:end]
+            batch = models.Batch.model_construct(
+                ids=ids[start:end],
+                vectors=vectors,
+                payloads=payloads[start:end],
             )
-            points.append(point)
+            async with semaphore:
+                await self._client.upsert(
+                    collection_name=collection_name,
+                    points=batch,
+                    wait=wait,
+                )
         
-        # Batch upsert
-        await self._client.upsert(
-            collection_name=collection_name,
-            points=points,
-            wait=True,
-        )
+        async def send_all() -> None:
+            # Vector names follow the layout the collection was created with.
+            # All but the last slice go out concurrently without waiting;
+            # writes apply in order, so waiting on the last one covers the rest
+            short = await self._layout(tenant_id, create=True)
+            starts = range(0, len(chunks), self.UPSERT_BATCH_SIZE)
+            await asyncio.gather(*[send(start, False, short) for start in starts[:-1]])
+            await send(starts[-1], wait, short)
+        
+        # The collection normally exists already (bootstrap_tenants or an
+        # earlier write); if Qdrant reports it missing, it was dropped behind
+        # this process's back, so look it up (and create it) again.
+        # Upserts are idempotent, so resending is safe
+        try:
+            await send_all()
+        except Exception as e:
+            if not _is_missing_collection(e):
+                raise
+            _collection_layouts.pop(collection_name, None)
+            await send_all()
+        _search_cache.invalidate(tenant_id)
         
         logger.info(
             "Chunks upserted",
             tenant_id=tenant_id,
-            count=len(points),
+            count=len(chunks),
         )
         
-        return len(points)
+        return len(chunks)
+
+    def _payload(self, chunk: DocumentChunk) -> dict[str, Any]:
+        """Build a point payload from chunk metadata, dropping None values."""
+        return {
+            "source_type": "unknown",
+            **{
+                _PAYLOAD_KEYS.get(k, k): v
+                for k, v in chunk.metadata.items()
+                if v is not None
+            },
+            "document_id": chunk.document_id,
+            "chunk_index": chunk.chunk_index,
+            "content": chunk.content,
+        }
 
     async def search(
         self,
         tenant_id: str,
-        query_embedding: list[float],
+        query_embedding: list[float] | np.ndarray,
         limit: int = 10,
         score_threshold: float | None = None,
         filters: dict[str, Any] | None = None,
+        with_vectors: bool = False,
+        sparse_embedding: models.SparseVector | None = None,
+        accuracy: Literal["fast", "balanced", "high"] = "balanced",
     ) -> list[dict[str, Any]]:
         """
         Search for similar chunks.
         
+        With a sparse query vector, dense and sparse candidates are fetched
+        separately and fused server-side with reciprocal rank fusion. Dense
+        queries within search_cache_similarity of a recent one reuse its
+        results until they expire or the tenant's collection changes.
+        
         Args:
             tenant_id: Tenant identifier
             query_embedding: Query vector
             limit: Maximum results to return
-            score_threshold: Minimum similarity score
+            score_threshold: Minimum similarity score (fused score when hybrid)
             filters: Metadata filters to apply
+            with_vectors: Include each chunk's stored vector as "embedding"
+            sparse_embedding: Optional sparse query vector for the "text" index
+            accuracy: Recall/latency tradeoff for the dense search; sets hnsw_ef
+                to 64 (fast), 128 (balanced) or 256 (high)
             
         Returns:
             List of search results with scores and payloads
         """
-        collection_name = self._collection_name(tenant_id)
+        # Near-duplicate dense queries reuse recent results. Hybrid ones skip
+        # the cache, since the sparse vector isn't part of the match, and so
+        # do ones returning vectors, which would hold every hit's embedding
+        cache_key = unit_query = None
+        if sparse_embedding is None and not with_vectors:
+            cache_key = self._search_cache_key(
+                tenant_id, limit, score_threshold, filters, accuracy
+            )
+            unit_query = _unit(query_embedding)
+            cached = _search_cache.get(cache_key, unit_query)
+            if cached is not None:
+                return cached
         
-        # Build filter conditions
-        filter_conditions = []
-        if filters:
-            for field, value in filters.items():
-                if isinstance(value, list):
-                    # OR condition for list values
-                    filter_conditions.append(
-                        FieldCondition(
-                            key=field,
-                            match=models.MatchAny(any=value),
-                        )
-                    )
-                else:
-                    filter_conditions.append(
-                        FieldCondition(
-                            key=field,
-                            match=MatchValue(value=value),
-                        )
-                    )
+        short = await self._layout(tenant_id)
+        request = self._query_request(
+            query_embedding,
+            short,
+            limit=limit,
+            score_threshold=score_threshold,
+            query_filter=self._build_filter(filters),
+            with_vectors=with_vectors,
+            sparse_embedding=sparse_embedding,
+            accuracy=accuracy,
+        )
+        response = await self._client.query_points(
+            collection_name=self._collection_name(tenant_id),
+            query=request.query,
+            using=request.using,
+            prefetch=request.prefetch,
+            query_filter=request.filter,
+            limit=request.limit,
+            score_threshold=request.score_threshold,
+            with_payload=True,
+            with_vectors=request.with_vector,
+            search_params=request.params,
+        )
         
-        query_filter = Filter(must=filter_conditions) if filter_conditions else None
+        hits = self._to_hits(response.points, with_vectors, short)
+        if cache_key is not None:
+            _search_cache.set(cache_key, unit_query, hits)
+        return hits
+
+    async def search_batch(
+        self,
+        tenant_id: str,
+        query_embeddings: list[list[float] | np.ndarray],
+        limit: int = 10,
+        score_threshold: float | None = None,
+        filters: dict[str, Any] | None = None,
+        with_vectors: bool = False,
+        accuracy: Literal["fast", "balanced", "high"] = "balanced",
+        sparse_embeddings: list[models.SparseVector] | None = None,
+    ) -> list[list[dict[str, Any]]]:
+        """
+        Run several searches against one tenant in a single request.
         
-        results = await self._client.search(
-            collection_name=collection_name,
-            query_vector=query_embedding,
-            query_filter=query_filter,
+        Args:
+            tenant_id: Tenant identifier
+            query_embeddings: Query vectors
+            limit: Maximum results per query
+            score_threshold: Minimum similarity score
+            filters: Metadata filters applied to every query
+            with_vectors: Include each chunk's stored vector as "embedding"
+            accuracy: Recall/latency tradeoff, as in search()
+            sparse_embeddings: Optional sparse query vectors, aligned with
+                query_embeddings, to run hybrid searches as in search()
+            
+        Returns:
+            One result list per query embedding, in input order
+        """
+        if not query_embeddings:
+            return []
+        
+        # Only dense queries without vectors go through the result cache
+        cache_key = unit_queries = None
+        results: list[Any] = [None] * len(query_embeddings)
+        if sparse_embeddings is None and not with_vectors:
+            cache_key = self._search_cache_key(
+                tenant_id, limit, score_threshold, filters, accuracy
+            )
+            unit_queries = [_unit(query_embedding) for query_embedding in query_embeddings]
+            results = [_search_cache.get(cache_key, unit) for unit in unit_queries]
+        missing = [i for i, hits in enumerate(results) if hits is None]
+        if not missing:
+            return results
+        
+        short = await self._layout(tenant_id)
+        query_filter = self._build_filter(filters)
+        requests = [
+            self._query_request(
+                query_embeddings[i],
+                short,
+                limit=limit,
+                score_threshold=score_threshold,
+                query_filter=query_filter,
+                with_vectors=with_vectors,
+                sparse_embedding=sparse_embeddings[i] if sparse_embeddings else None,
+                accuracy=accuracy,
+            )
+            for i in missing
+        ]
+        responses = await self._client.query_batch_points(
+            collection_name=self._collection_name(tenant_id),
+            requests=requests,
+        )
+        
+        for i, response in zip(missing, responses):
+            results[i] = self._to_hits(response.points, with_vectors, short)
+            if cache_key is not None:
+                _search_cache.set(cache_key, unit_queries[i], results[i])
+        return results
+
+    async def search_documents(
+        self,
+        tenant_id: str,
+        query_embedding: list[float] | np.ndarray,
+        limit: int = 10,
+        filters: dict[str, Any] | None = None,
+        exclude: dict[str, Any] | None = None,
+        accuracy: Literal["fast", "balanced", "high"] = "balanced",
+    ) -> list[dict[str, Any]]:
+        """
+        Search for similar documents, returning each one's best chunk.
+        
+        Results are grouped by document_id server-side, so up to limit
+        distinct documents come back however many chunks each one has.
+        
+        Args:
+            tenant_id: Tenant identifier
+            query_embedding: Query vector
+            limit: Maximum documents to return
+            filters: Metadata filters to apply
+            exclude: Metadata filters that exclude matching chunks
+            accuracy: Recall/latency tradeoff, as in search()
+            
+        Returns:
+            One search result per document, best first
+        """
+        short = await self._layout(tenant_id)
+        request = self._query_request(
+            query_embedding,
+            short,
             limit=limit,
-            score_threshold=score_threshold,
+            score_threshold=None,
+            query_filter=self._build_filter(filters, exclude),
+            with_vectors=False,
+            accuracy=accuracy,
+        )
+        response = await self._client.query_points_groups(
+            collection_name=self._collection_name(tenant_id),
+            group_by="document_id",
+            query=request.query,
+            using=request.using,
+            prefetch=request.prefetch,
+            query_filter=request.filter,
+            limit=limit,
+            group_size=1,
             with_payload=True,
-            search_params=SearchParams(
-                hnsw_ef=128,  # Higher for better recall
-                exact=False,
-            ),
+            search_params=request.params,
         )
         
         return [
-            {
+            hit
+            for group in response.groups
+            for hit in self._to_hits(group.hits, False, short)
+        ]
+
+    def _search_cache_key(
+        self,
+        tenant_id: str,
+        limit: int,
+        score_threshold: float | None,
+        filters: dict[str, Any] | None,
+        accuracy: str,
+    ) -> tuple:
+        """Everything besides the query vector that determines a result list."""
+        # Callers pass tenant IDs as str or UUID; invalidate() matches on str
+        filter_key = repr(sorted(filters.items())) if filters else None
+        return (str(tenant_id), filter_key, limit, score_threshold, accuracy)
+
+    def _build_filter(
+        self,
+        filters: dict[str, Any] | None,
+        exclude: dict[str, Any] | None = None,
+    ) -> Filter | None:
+        """Build a Qdrant filter; list values match any of their items."""
+        if exclude:
+            excluded = self._build_filter(exclude)
+            included = self._build_filter(filters)
+            return Filter(must=included.must if included else None, must_not=excluded.must)
+        if not filters:
+            return None
+        
+        # Repeated filter shapes reuse one validated Filter
+        frozen = tuple(sorted(
+            (field, tuple(value) if isinstance(value, list) else value)
+            for field, value in filters.items()
+        ))
+        try:
+            return _frozen_filter(frozen)
+        except TypeError:
+            # Unhashable value; build it uncached
+            return _frozen_filter.__wrapped__(frozen)
+
+    def _query_request(
+        self,
+        query_embedding: list[float] | np.ndarray,
+        short_dimensions: int | None,
+        limit: int,
+        score_threshold: float | None,
+        query_filter: Filter | None,
+        with_vectors: bool,
+        sparse_embedding: models.SparseVector | None = None,
+        accuracy: Literal["fast", "balanced", "high"] = "balanced",
+    ) -> models.QueryRequest:
+        """Build one dense or hybrid (dense + sparse, RRF-fused) query."""
+        search_params = SearchParams(
+            hnsw_ef=self.HNSW_EF[accuracy],
+            exact=False,
+            quantization=models.QuantizationSearchParams(
+                rescore=True,
+                oversampling=2.0,
+            ),
+        )
+        dense_query = _as_list(query_embedding)
+        with_vector = self._vector_selector(short_dimensions) if with_vectors else False
+        
+        if short_dimensions:
+            # Rank a shortlist on the cheap prefix, then rescore it on the
+            # full vector
+            dense_stage: dict[str, Any] = {
+                "query": dense_query,
+                "using": FULL_VECTOR,
+                "prefetch": models.Prefetch(
+                    query=dense_query[:short_dimensions],
+                    using=SHORT_VECTOR,
+                    params=search_params,
+                    limit=limit * self.MATRYOSHKA_PREFETCH_FACTOR,
+                ),
+            }
+        else:
+            dense_stage = {"query": dense_query, "params": search_params}
+        
+        if sparse_embedding is None:
+            return models.QueryRequest(
+                **dense_stage,
+                filter=query_filter,
+                limit=limit,
+                score_threshold=score_threshold,
+                with_payload=True,
+                with_vector=with_vector,
+            )
+        
+        # The outer filter also applies to the prefetches; RRF merges their lists
+        candidates = limit * self.HYBRID_PREFETCH_FACTOR
+        return models.QueryRequest(
+            query=models.FusionQuery(fusion=models.Fusion.RRF),
+            prefetch=[
+                models.Prefetch(**dense_stage, limit=candidates),
+                models.Prefetch(
+                    query=sparse_embedding,
+                    using="text",
+                    limit=candidates,
+                ),
+            ],
+            filter=query_filter,
+            limit=limit,
+            score_threshold=score_threshold,
+            with_payload=True,
+            with_vector=with_vector,
+        )
+
+    def _vector_selector(self, short_dimensions: int | None) -> bool | list[str]:
+        """Request only the full dense vector when points have several."""
+        return [FULL_VECTOR] if short_dimensions else True
+
+    def _dense_vector(self, vector: Any, short_dimensions: int | None) -> list[float] | None:
+        """Pick the full dense vector out of a point's (possibly named) vectors."""
+        if isinstance(vector, dict):
+            return vector.get(FULL_VECTOR if short_dimensions else "")
+        return vector
+
+    def _to_hits(
+        self,
+        points: list[models.ScoredPoint],
+        with_vectors: bool,
+        short_dimensions: int | None,
+    ) -> list[dict[str, Any]]:
+        """Convert scored points to result dicts."""
+        hits = []
+        for result in points:
+            hit = {
                 "id": result.id,
                 "score": result.score,
                 "content": result.payload.get("content"),
@@ -252,13 +876,73 @@ class VectorStore:
                     if k not in ["content", "document_id", "tenant_id"]
                 },
             }
-            for result in results
-        ]
+            if with_vectors:
+                hit["embedding"] = self._dense_vector(result.vector, short_dimensions)
+            hits.append(hit)
+        
+        return hits
+
+    async def get_chunk_by_document_id(
+        self,
+        tenant_id: str,
+        document_id: str,
+        with_content: bool = True,
+    ) -> dict[str, Any] | None:
+        """
+        Fetch one chunk of a document, including its stored embedding.
+        
+        Uses a payload-filtered scroll, so no vector scoring is performed.
+        
+        Args:
+            tenant_id: Tenant identifier
+            document_id: Document ID
+            with_content: Also return the chunk text; callers that only need
+                the embedding can skip transferring it
+            
+        Returns:
+            Chunk dict with an "embedding" key, or None if not found
+        """
+        collection_name = self._collection_name(tenant_id)
+        short = await self._layout(tenant_id)
+        
+        points, _ = await self._client.scroll(
+            collection_name=collection_name,
+            scroll_filter=Filter(
+                must=[
+                    FieldCondition(
+                        key="document_id",
+                        match=MatchValue(value=document_id),
+                    )
+                ]
+            ),
+            limit=1,
+            with_payload=(
+                True if with_content
+                else models.PayloadSelectorExclude(exclude=["content"])
+            ),
+            with_vectors=self._vector_selector(short),
+        )
+        
+        if not points:
+            return None
+        
+        point = points[0]
+        return {
+            "id": point.id,
+            "content": point.payload.get("content"),
+            "document_id": point.payload.get("document_id"),
+            "embedding": self._dense_vector(point.vector, short),
+            "metadata": {
+                k: v for k, v in point.payload.items()
+                if k not in ["content", "document_id", "tenant_id"]
+            },
+        }
 
     async def delete_by_document(
         self,
         tenant_id: str,
         document_id: str,
+        wait: bool = True,
     ) -> int:
         """
         Delete all chunks for a document.
@@ -266,34 +950,87 @@ class VectorStore:
         Args:
             tenant_id: Tenant identifier
             document_id: Document ID to delete
+            wait: Block until Qdrant has applied the delete. With False,
+                cached searches may still return the deleted chunks until
+                they expire
             
         Returns:
             Number of points deleted
         """
         collection_name = self._collection_name(tenant_id)
+        document_filter = Filter(
+            must=[
+                FieldCondition(
+                    key="document_id",
+                    match=MatchValue(value=document_id),
+                )
+            ]
+        )
         
-        result = await self._client.delete(
+        # Deletes don't report how many points they removed; counting first
+        # is cheap since document_id is indexed
+        result = await self._client.count(
             collection_name=collection_name,
+            count_filter=document_filter,
+            exact=True,
+        )
+        if result.count:
+            await self._client.delete(
+                collection_name=collection_name,
+                points_selector=models.FilterSelector(filter=document_filter),
+                wait=wait,
+            )
+            _search_cache.invalidate(tenant_id)
+        
+        logger.info(
+            "Document chunks deleted",
+            tenant_id=tenant_id,
+            document_id=document_id,
+            count=result.count,
+        )
+        
+        return result.count
+
+    async def delete_by_documents(
+        self,
+        tenant_id: str,
+        document_ids: list[str],
+        wait: bool = True,
+    ) -> None:
+        """
+        Delete all chunks for several documents in one request.
+        
+        Args:
+            tenant_id: Tenant identifier
+            document_ids: Document IDs to delete
+            wait: Block until Qdrant has applied the delete. With False, the
+                request returns once it is accepted and cached searches may
+                still return the deleted chunks until they expire
+        """
+        if not document_ids:
+            return
+        
+        await self._client.delete(
+            collection_name=self._collection_name(tenant_id),
             points_selector=models.FilterSelector(
                 filter=Filter(
                     must=[
                         FieldCondition(
                             key="document_id",
-                            match=MatchValue(value=document_id),
+                            match=models.MatchAny(any=document_ids),
                         )
                     ]
                 )
             ),
-            wait=True,
+            wait=wait,
         )
+        _search_cache.invalidate(tenant_id)
         
         logger.info(
             "Document chunks deleted",
             tenant_id=tenant_id,
-            document_id=document_id,
+            document_count=len(document_ids),
         )
-        
-        return 1  # Qdrant doesn't return count
 
     async def delete_collection(self, tenant_id: str) -> None:
         """
@@ -303,6 +1040,8 @@ class VectorStore:
             tenant_id: Tenant identifier
         """
         collection_name = self._collection_name(tenant_id)
+        _collection_layouts.pop(collection_name, None)
+        _search_cache.invalidate(tenant_id)
         
         try:
             await self._client.delete_collection(collection_name)
@@ -338,5 +1077,8 @@ class VectorStore:
             return None
 
     async def close(self) -> None:
-        """Close the client connection."""
-        await self._client.close()
+        """
+        Release this store.
+        
+        The client is shared; close_vector_clients() closes it.
+        """
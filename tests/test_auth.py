@@ -3,19 +3,27 @@ Tests for authentication module.
 """
 
 from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
 from uuid import uuid4
 
 import pytest
+from redis.exceptions import ConnectionError as RedisConnectionError
 
+from evergreen.auth import revocation
 from evergreen.auth.jwt import (
     create_access_token,
     create_refresh_token,
     decode_token,
+    sign_pair,
     verify_token_type,
     TokenError,
 )
 from evergreen.auth.password import hash_password, verify_password
 from evergreen.config import settings
+from evergreen.services import auth as auth_service
+from evergreen.services import user as user_service
+from evergreen.services.auth import AuthService
+from evergreen.services.user import UserService
 
 
 # =============================================================================
@@ -167,6 +175,39 @@ class TestJWT:
         time_diff = data.exp - now
         assert timedelta(hours=1, minutes=59) < time_diff < timedelta(hours=2, minutes=1)
 
+    def test_sign_pair(self):
+        """Test signing an access/refresh pair in one call."""
+        access_token, refresh_token = sign_pair(
+            user_id=self.user_id,
+            tenant_id=self.tenant_id,
+            email=self.email,
+            role="admin",
+        )
+        
+        access_data = decode_token(access_token)
+        refresh_data = decode_token(refresh_token)
+        
+        assert access_data.token_type == "access"
+        assert refresh_data.token_type == "refresh"
+        assert access_data.sub == refresh_data.sub == self.user_id
+        assert refresh_data.email == self.email
+        assert refresh_data.role == "admin"
+        assert refresh_data.exp > access_data.exp
+
+    def test_sign_pair_capped_expiry(self):
+        """Test that expires_at caps both tokens of a pair."""
+        expires_at = datetime.now(timezone.utc) + timedelta(minutes=5)
+        access_token, refresh_token = sign_pair(
+            user_id=self.user_id,
+            tenant_id=self.tenant_id,
+            email=self.email,
+            expires_at=expires_at,
+        )
+        
+        limit = expires_at.replace(microsecond=0)
+        assert decode_token(access_token).exp <= limit
+        assert decode_token(refresh_token).exp <= limit
+
     def test_decode_invalid_token(self):
         """Test decoding invalid token raises error."""
         with pytest.raises(TokenError):
@@ -218,3 +259,141 @@ class TestAuthIntegration:
         # Verify types
         assert verify_token_type(access_data, "access")
         assert verify_token_type(refresh_data, "refresh")
+
+
+# =============================================================================
+# Refresh Tests
+# =============================================================================
+
+class TestRefresh:
+    """Tests for claims-only and database-checked token refresh."""
+
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.user_id = str(uuid4())
+        self.tenant_id = uuid4()
+        self.email = "test@example.com"
+        self.service = AuthService(db=None)
+        self.db_lookups = []
+        _, self.refresh_token = sign_pair(
+            user_id=self.user_id,
+            tenant_id=self.tenant_id,
+            email=self.email,
+            role="admin",
+        )
+
+    def _stub(self, monkeypatch, stale, active=True):
+        """Stub the stale-marker check and the user lookup."""
+        async def is_user_stale(user_id):
+            return stale
+        
+        async def get(user_id):
+            self.db_lookups.append(user_id)
+            return SimpleNamespace(
+                id=user_id,
+                tenant_id=self.tenant_id,
+                email=self.email,
+                role="user",
+                is_active=active,
+            )
+        
+        monkeypatch.setattr(auth_service, "is_user_stale", is_user_stale)
+        monkeypatch.setattr(self.service.user_service, "get", get)
+
+    async def test_not_stale_refreshes_from_claims(self, monkeypatch):
+        """Test that an unmarked user is refreshed without a DB lookup."""
+        self._stub(monkeypatch, stale=False)
+        
+        tokens = await self.service.refresh(self.refresh_token)
+        
+        assert self.db_lookups == []
+        assert decode_token(tokens.access_token).role == "admin"
+        assert decode_token(tokens.refresh_token).exp <= decode_token(self.refresh_token).exp
+
+    async def test_stale_user_checked_against_db(self, monkeypatch):
+        """Test that a marked user is re-read and gets their current role."""
+        self._stub(monkeypatch, stale=True)
+        
+        tokens = await self.service.refresh(self.refresh_token)
+        
+        assert len(self.db_lookups) == 1
+        assert decode_token(tokens.access_token).role == "user"
+        assert decode_token(tokens.refresh_token).exp <= decode_token(self.refresh_token).exp
+
+    async def test_stale_inactive_user_rejected(self, monkeypatch):
+        """Test that a deactivated user can't refresh."""
+        self._stub(monkeypatch, stale=True, active=False)
+        
+        with pytest.raises(ValueError):
+            await self.service.refresh(self.refresh_token)
+
+    async def test_redis_down_falls_back_to_db(self, monkeypatch):
+        """Test that an unavailable marker store forces the DB path."""
+        self._stub(monkeypatch, stale=None)
+        
+        await self.service.refresh(self.refresh_token)
+        
+        assert len(self.db_lookups) == 1
+
+    async def test_mark_user_stale_fails_closed(self, monkeypatch):
+        """Test that a failed marker write propagates to the caller."""
+        class DownRedis:
+            async def set(self, *args, **kwargs):
+                raise RedisConnectionError("down")
+        
+        monkeypatch.setattr(revocation, "_redis", lambda: DownRedis())
+        
+        with pytest.raises(RedisConnectionError):
+            await revocation.mark_user_stale(self.user_id)
+
+
+class TestStaleMarking:
+    """Tests for when user changes write a stale marker."""
+
+    def setup_method(self):
+        """Set up test fixtures."""
+        class FakeSession:
+            async def flush(self):
+                pass
+        
+        self.service = UserService(FakeSession())
+        self.user = SimpleNamespace(
+            id=uuid4(), email="test@example.com", name="Test", role="user", is_active=True
+        )
+        self.marked = []
+
+    def _stub(self, monkeypatch):
+        """Stub the user lookup and record marker writes."""
+        async def get(user_id):
+            return self.user
+        
+        async def mark_user_stale(user_id):
+            self.marked.append(user_id)
+        
+        monkeypatch.setattr(self.service, "get", get)
+        monkeypatch.setattr(user_service, "mark_user_stale", mark_user_stale)
+
+    async def test_unchanged_claims_not_marked(self, monkeypatch):
+        """Test that name changes and no-op role updates skip Redis."""
+        self._stub(monkeypatch)
+
+        await self.service.update(self.user.id, name="Renamed", role="user")
+
+        assert self.marked == []
+
+    async def test_role_change_marked(self, monkeypatch):
+        """Test that a role change forces refreshes through the DB."""
+        self._stub(monkeypatch)
+
+        await self.service.update(self.user.id, role="admin")
+
+        assert self.marked == [str(self.user.id)]
+
+    async def test_delete_marks_active_user_once(self, monkeypatch):
+        """Test that deleting an already inactive user writes no marker."""
+        self._stub(monkeypatch)
+
+        await self.service.delete(self.user.id)
+        await self.service.delete(self.user.id)
+
+        assert self.marked == [str(self.user.id)]
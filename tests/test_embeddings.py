@@ -0,0 +1,147 @@
+"""
+Tests for embedding generation, run against a stand-in for the Voyage API.
+"""
+
+from types import SimpleNamespace
+from uuid import uuid4
+
+from evergreen.config import settings
+from evergreen.models import DocumentChunk
+from evergreen.storage import embeddings
+from evergreen.storage.embeddings import EmbeddingGenerator
+
+
+class FakeVoyageClient:
+    """Records each request and embeds a text as [len(text), 0, 0, 0]."""
+
+    def __init__(self):
+        self.requests = []
+
+    async def embed(self, texts, model, input_type, output_dimension):
+        self.requests.append(list(texts))
+        return SimpleNamespace(embeddings=[[float(len(text)), 0.0, 0.0, 0.0] for text in texts])
+
+
+def make_generator() -> EmbeddingGenerator:
+    """Build a generator without network access."""
+    generator = EmbeddingGenerator(api_key="test-key", model="test-model", dimensions=4)
+    generator.REQUEST_JITTER_SECONDS = 0
+    generator._client = FakeVoyageClient()
+    return generator
+
+
+def make_chunk(content: str) -> DocumentChunk:
+    """Build a chunk with the given text."""
+    return DocumentChunk(
+        document_id="d1",
+        tenant_id=uuid4(),
+        content=content,
+        chunk_index=0,
+        token_count=1,
+    )
+
+
+# =============================================================================
+# Batch Packing Tests
+# =============================================================================
+
+class TestPackBatches:
+    """Tests for token-aware batch packing."""
+
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.generator = make_generator()
+        self.generator.MAX_BATCH_SIZE = 3
+        self.generator.MAX_TOKENS_PER_BATCH = 100
+
+    def test_empty_input(self):
+        """Test that no inputs give no batches."""
+        assert self.generator._pack_batches([]) == []
+
+    def test_splits_on_batch_size(self):
+        """Test that batches hold at most MAX_BATCH_SIZE inputs."""
+        bounds = self.generator._pack_batches([1] * 7)
+
+        assert bounds == [(0, 3), (3, 6), (6, 7)]
+
+    def test_splits_on_token_limit(self):
+        """Test that a batch closes before it would pass the token limit."""
+        bounds = self.generator._pack_batches([60, 30, 20, 50])
+
+        assert bounds == [(0, 2), (2, 4)]
+
+    def test_oversized_input_gets_own_batch(self):
+        """Test that an input over the token limit is sent alone."""
+        bounds = self.generator._pack_batches([10, 500, 10])
+
+        assert bounds == [(0, 1), (1, 2), (2, 3)]
+
+    def test_batches_cover_input_in_order(self):
+        """Test that batches are contiguous and cover every input once."""
+        counts = [7, 90, 3, 3, 45, 60, 1, 99, 2]
+        bounds = self.generator._pack_batches(counts)
+
+        assert bounds[0][0] == 0
+        assert bounds[-1][1] == len(counts)
+        assert all(prev[1] == nxt[0] for prev, nxt in zip(bounds, bounds[1:]))
+        for start, end in bounds:
+            assert end - start <= 3
+            assert end - start == 1 or sum(counts[start:end]) <= 100
+
+
+# =============================================================================
+# Embedding Cache Tests
+# =============================================================================
+
+class TestEmbeddingCache:
+    """Tests for the shared content-hash embedding cache."""
+
+    def setup_method(self):
+        """Set up test fixtures."""
+        embeddings._embedding_cache.clear()
+        self.generator = make_generator()
+        self.client = self.generator._client
+
+    async def test_repeated_text_embedded_once(self):
+        """Test that a cached text doesn't reach the API again."""
+        first = await self.generator.embed_texts(["hello"])
+        second = await self.generator.embed_texts(["hello"])
+
+        assert first == second == [[5.0, 0.0, 0.0, 0.0]]
+        assert self.client.requests == [["hello"]]
+
+    async def test_duplicates_in_one_call_sent_once(self):
+        """Test that repeated texts within a call share one API input."""
+        result = await self.generator.embed_texts(["ab", "abc", "ab"])
+
+        assert result[0] == result[2] == [2.0, 0.0, 0.0, 0.0]
+        assert self.client.requests == [["ab", "abc"]]
+
+    async def test_input_type_kept_apart(self):
+        """Test that query and document embeddings are cached separately."""
+        await self.generator.embed_texts(["hello"])
+        await self.generator.embed_query("hello")
+
+        assert self.client.requests == [["hello"], ["hello"]]
+
+    async def test_least_recently_used_evicted(self, monkeypatch):
+        """Test that the cache stays within embedding_cache_size."""
+        monkeypatch.setattr(settings, "embedding_cache_size", 2)
+
+        await self.generator.embed_texts(["a", "bb", "ccc"])
+        await self.generator.embed_texts(["a"])
+
+        assert len(embeddings._embedding_cache) == 2
+        assert self.client.requests == [["a", "bb", "ccc"], ["a"]]
+
+    async def test_stream_yields_cached_chunks_first(self):
+        """Test that cached and duplicate chunks skip the API."""
+        await self.generator.embed_texts(["cached"])
+        chunks = [make_chunk("new"), make_chunk("cached"), make_chunk("new")]
+
+        batches = [batch async for batch in self.generator.embed_chunks_stream(chunks)]
+
+        assert [chunk.id for chunk in batches[0][0]] == [chunks[1].id]
+        assert {chunk.id for chunk in batches[1][0]} == {chunks[0].id, chunks[2].id}
+        assert batches[1][1] == [[3.0, 0.0, 0.0, 0.0]] * 2
+        assert self.client.requests == [["cached"], ["new"]]
@@ -9,6 +9,7 @@ import pytest
 
 from evergreen.ingestion.parser import DocumentParser
 from evergreen.ingestion.chunker import SemanticChunker, ChunkingConfig
+from evergreen.ingestion.orchestrator import _likely_has_entity
 from evergreen.models import DataSource, RawDocument
 
 
@@ -208,6 +209,40 @@ class TestSemanticChunker:
         assert chunks[0].metadata["source"] == "m365_teams"
 
 
+# =============================================================================
+# Orchestrator Tests
+# =============================================================================
+
+class TestEntityPrefilter:
+    """Tests for the entity extraction pre-filter."""
+
+    def test_skips_short_acknowledgements(self):
+        """Test that short chunks are skipped."""
+        assert not _likely_has_entity("Thanks!")
+        assert not _likely_has_entity("Sounds good")
+
+    def test_skips_text_without_names(self):
+        """Test that lowercase chatter without numbers is skipped."""
+        assert not _likely_has_entity("sounds good, will take a look later on")
+
+    def test_keeps_named_entities(self):
+        """Test that chunks mentioning names or dates are kept."""
+        assert _likely_has_entity("Met with John Smith about the rollout plan")
+        assert _likely_has_entity("the invoice is due on 2025-03-01 per contract")
+        assert _likely_has_entity("Please forward this to Sarah when she is back")
+        assert _likely_has_entity("send the signed copy to legal@acme.com today")
+
+    def test_skips_boilerplate(self):
+        """Test that sentence-initial capitals alone don't mark a chunk."""
+        assert not _likely_has_entity(
+            "Please let me know if you have any questions. Thanks again for your help."
+        )
+        assert not _likely_has_entity(
+            "This message and any attachments are confidential. If you received it "
+            "in error, delete it and notify the sender."
+        )
+
+
 # =============================================================================
 # Integration Tests
 # =============================================================================
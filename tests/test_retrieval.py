@@ -0,0 +1,126 @@
+"""
+Tests for the retrieval engine's local (non-network) stages.
+"""
+
+from uuid import uuid4
+
+from evergreen.config import settings
+from evergreen.retrieval import engine
+from evergreen.retrieval.engine import RetrievalEngine
+
+
+class FakeEmbedder:
+    """Counts query embeddings and embeds a query as [len(query), 1]."""
+
+    def __init__(self):
+        self.calls = []
+
+    async def embed_query(self, query):
+        self.calls.append(query)
+        return [float(len(query)), 1.0]
+
+
+def make_engine(embedder=None) -> RetrievalEngine:
+    """Build an engine whose stores are never reached."""
+    return RetrievalEngine(
+        vector_store=object(),
+        graph_store=object(),
+        embedding_generator=embedder or FakeEmbedder(),
+        rerank=False,
+    )
+
+
+# =============================================================================
+# Query Embedding Cache Tests
+# =============================================================================
+
+class TestQueryEmbeddingCache:
+    """Tests for the shared query embedding cache."""
+
+    def setup_method(self):
+        """Set up test fixtures."""
+        engine._query_embedding_cache.clear()
+        self.embedder = FakeEmbedder()
+        self.engine = make_engine(self.embedder)
+        self.tenant_id = str(uuid4())
+
+    async def test_normalized_query_reused(self):
+        """Test that case and surrounding whitespace don't defeat the cache."""
+        first = await self.engine._embed_query_cached(self.tenant_id, "Project status")
+        second = await self.engine._embed_query_cached(self.tenant_id, "  project STATUS ")
+
+        assert first == second
+        assert self.embedder.calls == ["Project status"]
+
+    async def test_tenants_cached_separately(self):
+        """Test that one tenant's entry isn't served to another."""
+        await self.engine._embed_query_cached(self.tenant_id, "status")
+        await self.engine._embed_query_cached(str(uuid4()), "status")
+
+        assert len(self.embedder.calls) == 2
+
+    async def test_expired_entry_refreshed(self, monkeypatch):
+        """Test that entries past their TTL are embedded again."""
+        monkeypatch.setattr(settings, "query_embedding_cache_ttl_seconds", 0)
+
+        await self.engine._embed_query_cached(self.tenant_id, "status")
+        await self.engine._embed_query_cached(self.tenant_id, "status")
+
+        assert len(self.embedder.calls) == 2
+
+    async def test_least_recently_used_evicted(self, monkeypatch):
+        """Test that the cache stays within query_embedding_cache_size."""
+        monkeypatch.setattr(settings, "query_embedding_cache_size", 2)
+
+        for query in ["a", "b", "a", "c", "a", "b"]:
+            await self.engine._embed_query_cached(self.tenant_id, query)
+
+        assert len(engine._query_embedding_cache) == 2
+        assert self.embedder.calls == ["a", "b", "c", "b"]
+
+
+# =============================================================================
+# MMR Tests
+# =============================================================================
+
+class TestMMRRerank:
+    """Tests for Maximal Marginal Relevance selection."""
+
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.engine = make_engine()
+        self.query = [1.0, 0.0, 0.0]
+
+    def _results(self):
+        """Two near-duplicate top hits and a slightly less relevant, distinct one."""
+        return [
+            {"id": "a", "embedding": [0.8, 0.6, 0.0]},
+            {"id": "a-copy", "embedding": [0.8, 0.6, 0.01]},
+            {"id": "b", "embedding": [0.78, -0.62, 0.0]},
+        ]
+
+    def test_prefers_diverse_results(self):
+        """Test that a near-duplicate loses to a distinct result."""
+        selected = self.engine._mmr_rerank(self.query, self._results(), top_k=2)
+
+        assert [r["id"] for r in selected] == ["a", "b"]
+
+    def test_pure_relevance_keeps_similarity_order(self):
+        """Test that lambda 1.0 ranks by query similarity alone."""
+        selected = self.engine._mmr_rerank(self.query, self._results(), top_k=2, lambda_=1.0)
+
+        assert [r["id"] for r in selected] == ["a", "a-copy"]
+
+    def test_embeddings_removed(self):
+        """Test that selected results no longer carry their vectors."""
+        selected = self.engine._mmr_rerank(self.query, self._results(), top_k=2)
+
+        assert all("embedding" not in r for r in selected)
+
+    def test_missing_embeddings_truncate(self):
+        """Test that results without vectors keep their order."""
+        results = [{"id": "a"}, {"id": "b"}, {"id": "c"}]
+
+        selected = self.engine._mmr_rerank(self.query, results, top_k=2)
+
+        assert [r["id"] for r in selected] == ["a", "b"]
@@ -0,0 +1,509 @@
+"""
+Tests for the vector and graph stores, run against in-memory stand-ins for
+Qdrant and FalkorDB.
+"""
+
+from collections import OrderedDict
+from types import SimpleNamespace
+from uuid import uuid4
+
+from qdrant_client import models
+from qdrant_client.http.models import Distance, VectorParams
+
+from evergreen.ingestion.orchestrator import IngestionOrchestrator
+from evergreen.models import DocumentChunk, Entity, EntityMention, EntityType, Relationship
+from evergreen.storage import vector
+from evergreen.storage.graph import GraphStore
+from evergreen.storage.vector import VectorStore
+
+
+class FakeQdrantClient:
+    """Records writes and answers every query with one fixed point."""
+
+    def __init__(self, vectors=None):
+        self.vectors = vectors or VectorParams(size=4, distance=Distance.COSINE)
+        self.collection_reads = 0
+        self.upserts = []
+        self.queries = []
+
+    async def get_collection(self, collection_name):
+        self.collection_reads += 1
+        params = SimpleNamespace(vectors=self.vectors)
+        return SimpleNamespace(config=SimpleNamespace(params=params))
+
+    async def upsert(self, **kwargs):
+        self.upserts.append(kwargs)
+
+    async def query_points(self, **kwargs):
+        self.queries.append(kwargs)
+        point = SimpleNamespace(
+            id="p1",
+            score=0.9,
+            payload={"content": "hello", "document_id": "d1"},
+            vector=[0.5, 0.5, 0.5, 0.5],
+        )
+        return SimpleNamespace(points=[point])
+
+    async def query_points_groups(self, **kwargs):
+        self.queries.append(kwargs)
+        groups = [
+            SimpleNamespace(hits=[
+                SimpleNamespace(id=f"p{i}", score=0.9 - i / 10, payload={"document_id": doc})
+            ])
+            for i, doc in enumerate(["d2", "d3"])
+        ]
+        return SimpleNamespace(groups=groups)
+
+
+class FakeEmbedder:
+    """Streams one constant embedding per chunk."""
+
+    async def embed_chunks_stream(self, chunks):
+        yield chunks, [[0.5, 0.5, 0.5, 0.5] for _ in chunks]
+
+
+def make_store(client) -> VectorStore:
+    """Build a VectorStore around a fake client without connecting."""
+    store = object.__new__(VectorStore)
+    store._client = client
+    store.dimensions = 4
+    store.short_dimensions = None
+    return store
+
+
+def make_chunk(tenant_id) -> DocumentChunk:
+    """Build a one-token chunk."""
+    return DocumentChunk(
+        document_id="d1",
+        tenant_id=tenant_id,
+        content="hello",
+        chunk_index=0,
+        token_count=1,
+    )
+
+
+# =============================================================================
+# Search Cache Tests
+# =============================================================================
+
+class TestSearchCache:
+    """Tests for the shared search result cache."""
+
+    def setup_method(self):
+        """Set up test fixtures."""
+        vector._collection_layouts.clear()
+        vector._search_cache = vector._SearchCache(64, 60, 0.97)
+        self.client = FakeQdrantClient()
+        self.store = make_store(self.client)
+        self.tenant_id = uuid4()
+        self.query = [0.5, 0.5, 0.5, 0.5]
+
+    async def test_repeated_query_served_from_cache(self):
+        """Test that a repeated query doesn't reach Qdrant."""
+        first = await self.store.search(str(self.tenant_id), self.query)
+        second = await self.store.search(str(self.tenant_id), self.query)
+
+        assert second == first
+        assert len(self.client.queries) == 1
+
+    async def test_ingest_invalidates_cached_search(self):
+        """Test that ingesting for a UUID tenant drops its str-keyed results."""
+        await self.store.search(str(self.tenant_id), self.query)
+
+        orchestrator = IngestionOrchestrator(
+            parser=object(),
+            chunker=object(),
+            extractor=object(),
+            embedder=FakeEmbedder(),
+            vector_store=self.store,
+            graph_store=object(),
+        )
+        await orchestrator._embed_and_store(self.tenant_id, [make_chunk(self.tenant_id)])
+        await self.store.search(str(self.tenant_id), self.query)
+
+        assert len(self.client.upserts) == 1
+        assert len(self.client.queries) == 2
+
+    async def test_with_vectors_not_cached(self):
+        """Test that results carrying embeddings bypass the cache."""
+        await self.store.search(str(self.tenant_id), self.query, with_vectors=True)
+        hits = await self.store.search(str(self.tenant_id), self.query, with_vectors=True)
+
+        assert hits[0]["embedding"] == self.query
+        assert len(self.client.queries) == 2
+        assert vector._search_cache._size == 0
+
+
+    async def test_filters_cached_separately(self):
+        """Test that a filtered search doesn't reuse unfiltered results."""
+        await self.store.search(str(self.tenant_id), self.query)
+        await self.store.search(str(self.tenant_id), self.query, filters={"source": "slack"})
+
+        assert len(self.client.queries) == 2
+
+
+class TestSearchResultCache:
+    """Tests for near-duplicate matching, expiry and eviction."""
+
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.cache = vector._SearchCache(maxsize=2, ttl=60, threshold=0.97)
+        self.tenant_id = uuid4()
+        self.key = (str(self.tenant_id), None, 10, None, "balanced")
+        self.hits = [{"id": "p1", "score": 0.9}]
+
+    def test_near_duplicate_query_hits(self):
+        """Test that a query within the similarity threshold reuses results."""
+        self.cache.set(self.key, vector._unit([1.0, 0.0]), self.hits)
+
+        assert self.cache.get(self.key, vector._unit([1.0, 0.05])) == self.hits
+        assert self.cache.get(self.key, vector._unit([1.0, 1.0])) is None
+
+    def test_returns_copies(self):
+        """Test that callers can't mutate cached hits."""
+        self.cache.set(self.key, vector._unit([1.0, 0.0]), self.hits)
+        self.cache.get(self.key, vector._unit([1.0, 0.0]))[0]["score"] = 0.0
+
+        assert self.cache.get(self.key, vector._unit([1.0, 0.0])) == self.hits
+
+    def test_expired_entries_miss(self):
+        """Test that entries past their TTL are dropped."""
+        cache = vector._SearchCache(maxsize=2, ttl=0, threshold=0.97)
+        cache.set(self.key, vector._unit([1.0, 0.0]), self.hits)
+
+        assert cache.get(self.key, vector._unit([1.0, 0.0])) is None
+        assert cache._size == 0
+
+    def test_least_recently_used_group_evicted(self):
+        """Test that the cache stays within maxsize entries."""
+        other = (str(uuid4()), None, 10, None, "balanced")
+        self.cache.set(self.key, vector._unit([1.0, 0.0]), self.hits)
+        self.cache.set(self.key, vector._unit([0.0, 1.0]), self.hits)
+        self.cache.set(other, vector._unit([1.0, 0.0]), self.hits)
+
+        assert self.cache.get(self.key, vector._unit([1.0, 0.0])) is None
+        assert self.cache.get(other, vector._unit([1.0, 0.0])) == self.hits
+
+    def test_invalidate_accepts_uuid(self):
+        """Test that a UUID tenant ID drops its str-keyed entries."""
+        self.cache.set(self.key, vector._unit([1.0, 0.0]), self.hits)
+
+        self.cache.invalidate(self.tenant_id)
+
+        assert self.cache.get(self.key, vector._unit([1.0, 0.0])) is None
+        assert self.cache._size == 0
+
+
+# =============================================================================
+# Bulk Graph Write Tests
+# =============================================================================
+
+class FakeGraph:
+    """Records queries and returns one row per UNWIND row."""
+
+    def __init__(self):
+        self.queries = []
+
+    async def query(self, query, params=None):
+        self.queries.append((query, params))
+        rows = (params or {}).get("rows", [])
+        return SimpleNamespace(result_set=[[row.get("props", {}).get("id")] for row in rows])
+
+
+class TestBulkGraphWrites:
+    """Tests for the UNWIND-based graph writes."""
+
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.graph = FakeGraph()
+        self.store = object.__new__(GraphStore)
+        self.store._client = SimpleNamespace(select_graph=lambda name: self.graph)
+        self.store._graphs = OrderedDict()
+        self.tenant_id = uuid4()
+        self.entities = [
+            Entity(tenant_id=self.tenant_id, type=EntityType.PERSON, name="Ada Lovelace"),
+            Entity(
+                tenant_id=self.tenant_id,
+                type=EntityType.ORGANIZATION,
+                name="Acme",
+                metadata={"domain": "acme.com", "tags": ["x"]},
+            ),
+        ]
+
+    async def test_entities_merged_in_one_query(self):
+        """Test that a list of entities is written with a single MERGE."""
+        ids = await self.store.create_entities_bulk(str(self.tenant_id), self.entities)
+
+        assert len(self.graph.queries) == 1
+        query, params = self.graph.queries[0]
+        assert "UNWIND $rows" in query and "MERGE (e:Entity" in query
+        assert ids == [entity.id for entity in self.entities]
+        assert params["rows"][1]["props"]["domain"] == "acme.com"
+        assert "tags" not in params["rows"][1]["props"]
+
+    async def test_empty_writes_skip_the_graph(self):
+        """Test that empty batches don't issue a query."""
+        assert await self.store.create_entities_bulk(str(self.tenant_id), []) == []
+        await self.store.link_entities_to_document_bulk(str(self.tenant_id), "d1", [])
+
+        assert self.graph.queries == []
+
+    async def test_relationships_created_in_one_query(self):
+        """Test that relationship rows carry the model's type and strength."""
+        relationship = Relationship(
+            tenant_id=self.tenant_id,
+            source_entity_id=self.entities[0].id,
+            target_entity_id=self.entities[1].id,
+            relationship_type="works_at",
+            strength=0.8,
+            metadata={"source": "email"},
+        )
+
+        ids = await self.store.create_relationships_bulk(str(self.tenant_id), [relationship])
+
+        query, params = self.graph.queries[0]
+        assert "UNWIND $rows" in query
+        assert ids == [relationship.id]
+        assert params["rows"][0]["source_id"] == self.entities[0].id
+        assert params["rows"][0]["props"] == {
+            "id": relationship.id,
+            "type": "works_at",
+            "strength": 0.8,
+            "source": "email",
+        }
+
+    async def test_single_relationship_created(self):
+        """Test that create_relationship maps the same fields."""
+        relationship = Relationship(
+            tenant_id=self.tenant_id,
+            source_entity_id=self.entities[0].id,
+            target_entity_id=self.entities[1].id,
+            relationship_type="works_at",
+        )
+
+        assert await self.store.create_relationship(str(self.tenant_id), relationship) == (
+            relationship.id
+        )
+        _, params = self.graph.queries[0]
+        assert params["props"]["type"] == "works_at"
+        assert params["props"]["strength"] == 1.0
+
+    async def test_links_merged_on_position(self):
+        """Test that document links are MERGEd with -1 for unknown positions."""
+        await self.store.link_entities_to_document_bulk(
+            str(self.tenant_id),
+            "d1",
+            [
+                {"entity_id": "e1", "mention_text": "Ada", "position": 4},
+                {"entity_id": "e2"},
+            ],
+        )
+
+        query, params = self.graph.queries[0]
+        assert "{chunk_id: row.chunk_id, position: row.position}" in query
+        assert [row["position"] for row in params["rows"]] == [4, -1]
+        assert [row["chunk_id"] for row in params["rows"]] == ["", ""]
+        assert params["rows"][0]["props"] == {"mention_text": "Ada"}
+        assert params["rows"][1]["props"] == {}
+
+    async def test_upsert_attaches_mentions_to_entity_rows(self):
+        """Test that mentions travel with their entity and default to -1."""
+        mention = EntityMention(
+            entity_id=self.entities[0].id,
+            document_id="d1",
+            chunk_id="c1",
+            start_char=7,
+            end_char=19,
+            context="Met Ada Lovelace today",
+        )
+
+        await self.store.upsert_entities_with_links(
+            str(self.tenant_id), "d1", self.entities, [mention]
+        )
+
+        query, params = self.graph.queries[0]
+        assert "CREATE (e)-[:MENTIONED_IN]" not in query
+        assert "{chunk_id: mention.chunk_id, position: mention.position}" in query
+        assert "ON MATCH" not in query
+        assert params["doc_id"] == "d1"
+        assert params["rows"][0]["mentions"] == [{
+            "chunk_id": "c1",
+            "position": 7,
+            "props": {"mention_text": "Met Ada Lovelace today"},
+        }]
+        assert params["rows"][1]["mentions"] == [{"chunk_id": "", "position": -1, "props": {}}]
+
+    async def test_same_offset_in_two_chunks_kept_apart(self):
+        """Test that chunk-relative offsets don't collapse across chunks."""
+        mentions = [
+            EntityMention(
+                entity_id=self.entities[0].id,
+                document_id="d1",
+                chunk_id=chunk_id,
+                start_char=0,
+                end_char=3,
+                context=f"Ada in {chunk_id}",
+            )
+            for chunk_id in ["c1", "c2"]
+        ]
+
+        await self.store.upsert_entities_with_links(
+            str(self.tenant_id), "d1", self.entities[:1], mentions
+        )
+
+        _, params = self.graph.queries[0]
+        keys = [(m["chunk_id"], m["position"]) for m in params["rows"][0]["mentions"]]
+        assert keys == [("c1", 0), ("c2", 0)]
+
+    async def test_name_search_escapes_query_syntax(self):
+        """Test that punctuation in a name is matched literally, last word as a prefix."""
+        await self.store.find_entities_by_name(str(self.tenant_id), "O'Brien-Smith | Lov")
+
+        _, params = self.graph.queries[0]
+        assert params["pattern"] == "O\\'Brien\\-Smith \\| Lov*"
+
+    async def test_name_search_falls_back_to_substring_match(self):
+        """Test that an empty full-text result is retried with CONTAINS."""
+        await self.store.find_entities_by_name(str(self.tenant_id), "velace")
+
+        assert len(self.graph.queries) == 2
+        query, params = self.graph.queries[1]
+        assert "CONTAINS $pattern" in query
+        assert params["pattern"] == "velace"
+
+
+# =============================================================================
+# Query Building Tests
+# =============================================================================
+
+class TestHybridQuery:
+    """Tests for dense + sparse queries fused with RRF."""
+
+    def setup_method(self):
+        """Set up test fixtures."""
+        vector._collection_layouts.clear()
+        vector._search_cache = vector._SearchCache(64, 60, 0.97)
+        self.client = FakeQdrantClient()
+        self.store = make_store(self.client)
+        self.sparse = models.SparseVector(indices=[3, 7], values=[0.5, 1.2])
+
+    def test_dense_query_has_no_prefetch(self):
+        """Test that a dense-only query searches the vector directly."""
+        request = self.store._query_request(
+            [0.5] * 4, None, limit=5, score_threshold=None, query_filter=None,
+            with_vectors=False,
+        )
+
+        assert request.query == [0.5] * 4
+        assert request.prefetch is None
+        assert request.params.hnsw_ef == VectorStore.HNSW_EF["balanced"]
+
+    def test_hybrid_query_fuses_both_indices(self):
+        """Test that a sparse vector adds an RRF-fused sparse prefetch."""
+        request = self.store._query_request(
+            [0.5] * 4, None, limit=5, score_threshold=None, query_filter=None,
+            with_vectors=False, sparse_embedding=self.sparse, accuracy="high",
+        )
+
+        assert request.query.fusion == models.Fusion.RRF
+        dense, sparse = request.prefetch
+        candidates = 5 * VectorStore.HYBRID_PREFETCH_FACTOR
+        assert dense.limit == sparse.limit == candidates
+        assert dense.params.hnsw_ef == VectorStore.HNSW_EF["high"]
+        assert sparse.using == "text"
+        assert sparse.query == self.sparse
+
+    async def test_hybrid_search_bypasses_cache(self):
+        """Test that hybrid results are not served from the dense cache."""
+        for _ in range(2):
+            await self.store.search("t1", [0.5] * 4, sparse_embedding=self.sparse)
+
+        assert len(self.client.queries) == 2
+        assert self.client.queries[0]["query"].fusion == models.Fusion.RRF
+
+
+class TestDocumentSearch:
+    """Tests for similar-document search grouped by document."""
+
+    def setup_method(self):
+        """Set up test fixtures."""
+        vector._collection_layouts.clear()
+        self.client = FakeQdrantClient()
+        self.store = make_store(self.client)
+
+    async def test_source_excluded_in_filter(self):
+        """Test that the excluded document is filtered out by Qdrant."""
+        await self.store.search_documents(
+            "t1", [0.5] * 4, limit=2, filters={"source_type": "email"},
+            exclude={"document_id": "d1"},
+        )
+
+        query = self.client.queries[0]
+        assert query["group_by"] == "document_id"
+        assert query["group_size"] == 1
+        assert query["limit"] == 2
+        assert [c.key for c in query["query_filter"].must] == ["source_type"]
+        assert [c.key for c in query["query_filter"].must_not] == ["document_id"]
+        assert query["query_filter"].must_not[0].match.value == "d1"
+
+    async def test_one_result_per_document(self):
+        """Test that each group contributes its best chunk."""
+        hits = await self.store.search_documents("t1", [0.5] * 4, limit=2)
+
+        assert [hit["document_id"] for hit in hits] == ["d2", "d3"]
+        assert [hit["id"] for hit in hits] == ["p0", "p1"]
+
+
+class TestMatryoshkaSearch:
+    """Tests for two-stage search on a short prefix and the full vector."""
+
+    def setup_method(self):
+        """Set up test fixtures."""
+        vector._collection_layouts.clear()
+        vector._search_cache = vector._SearchCache(64, 60, 0.97)
+        self.named = {
+            vector.FULL_VECTOR: VectorParams(size=4, distance=Distance.COSINE),
+            vector.SHORT_VECTOR: VectorParams(size=2, distance=Distance.COSINE),
+        }
+
+    def test_prefix_prefetch_rescored_on_full_vector(self):
+        """Test that the shortlist is ranked on the prefix, then the full vector."""
+        store = make_store(FakeQdrantClient())
+        request = store._query_request(
+            [0.1, 0.2, 0.3, 0.4], 2, limit=5, score_threshold=None, query_filter=None,
+            with_vectors=True,
+        )
+
+        assert request.using == vector.FULL_VECTOR
+        assert request.prefetch.using == vector.SHORT_VECTOR
+        assert request.prefetch.query == [0.1, 0.2]
+        assert request.prefetch.limit == 5 * VectorStore.MATRYOSHKA_PREFETCH_FACTOR
+        assert request.with_vector == [vector.FULL_VECTOR]
+
+    async def test_named_collection_written_with_both_vectors(self):
+        """Test that upserts fill the short prefix from the collection's layout."""
+        client = FakeQdrantClient(self.named)
+        store = make_store(client)
+
+        await store.upsert("t1", [(make_chunk(uuid4()), [0.1, 0.2, 0.3, 0.4])])
+        await store.search("t1", [0.1, 0.2, 0.3, 0.4])
+
+        vectors = client.upserts[0]["points"].vectors
+        assert vectors[vector.FULL_VECTOR] == [[0.1, 0.2, 0.3, 0.4]]
+        assert vectors[vector.SHORT_VECTOR] == [[0.1, 0.2]]
+        assert client.queries[0]["using"] == vector.FULL_VECTOR
+        assert client.collection_reads == 1
+
+    async def test_unnamed_collection_kept_when_setting_enabled(self):
+        """Test that an existing single-vector collection isn't written as named."""
+        client = FakeQdrantClient()
+        store = make_store(client)
+        store.short_dimensions = 2
+
+        await store.upsert("t1", [(make_chunk(uuid4()), [0.1, 0.2, 0.3, 0.4])])
+        hits = await store.search("t1", [0.1, 0.2, 0.3, 0.4], with_vectors=True)
+
+        assert client.upserts[0]["points"].vectors == [[0.1, 0.2, 0.3, 0.4]]
+        assert client.queries[0]["using"] is None
+        assert client.queries[0]["prefetch"] is None
+        assert hits[0]["embedding"] == [0.5, 0.5, 0.5, 0.5]